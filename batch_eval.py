@@ -0,0 +1,266 @@
+# batch_eval.py
+
+import json
+import time
+import logging
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from chroma_store import embedding_model, search_many, index_version, log_shard_stats
+from llm_client import llm
+from main import run_rag_pipeline
+from batching import MicroBatcher
+from topic_memory import TopicMemory
+from candidate_pool import CandidatePool
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Batched Vector DB Adapter
+# ------------------------------------------------------------------
+def _embed_batch(texts):
+    return list(embedding_model.encode(texts))
+
+
+def _search_batch(requests):
+    """
+    Groups (embedding, top_k, include_embeddings, where) requests by
+    their options and runs each group as one Chroma query. A failing
+    group (e.g. a malformed filter) fails only its own requests.
+    """
+    groups = defaultdict(list)
+    for idx, (_, top_k, include_embeddings, where) in enumerate(requests):
+        key = (top_k, include_embeddings, json.dumps(where, sort_keys=True, default=repr))
+        groups[key].append(idx)
+
+    results = [None] * len(requests)
+    for (top_k, include_embeddings, _), indices in groups.items():
+        try:
+            hits = search_many(
+                [requests[i][0] for i in indices],
+                top_k,
+                include_embeddings,
+                requests[indices[0]][3],
+            )
+        except Exception as e:
+            hits = [e] * len(indices)
+
+        for i, docs in zip(indices, hits):
+            results[i] = docs
+
+    return results
+
+
+class BatchedVectorDB:
+    """
+    Same interface as gradio_app.VectorDBAdapter, but encode and search
+    calls from concurrent conversations are coalesced into batches.
+    """
+
+    def __init__(self, max_batch=64, max_wait=0.005):
+        self.embedder = MicroBatcher(
+            _embed_batch, max_batch, max_wait, name="embed-batcher"
+        ).submit
+        self._search = MicroBatcher(
+            _search_batch, max_batch, max_wait, name="search-batcher"
+        ).submit
+
+    def embed(self, query: str):
+        return self.embedder(query).tolist()
+
+    def search_embedding(self, query_embedding, top_k=5, include_embeddings=False, where=None):
+        return self._search((query_embedding, top_k, include_embeddings, where))
+
+    def search(self, query: str, top_k=5, where=None):
+        return self.search_embedding(self.embed(query), top_k, where=where)
+
+    def index_version(self):
+        return index_version()
+
+
+# ------------------------------------------------------------------
+# Conversation Replay
+# ------------------------------------------------------------------
+def load_conversations(path, limit=None):
+    """
+    Reads one conversation per JSONL line:
+    {"id": ..., "turns": ["question", ...], "filters": {...}}
+    ("filters" is an optional Chroma metadata filter)
+    """
+    conversations = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+
+            record = json.loads(line)
+            turns = [
+                turn["query"] if isinstance(turn, dict) else turn
+                for turn in record["turns"]
+            ]
+            conversations.append({
+                "id": record.get("id", record.get("conversation_id", line_no)),
+                "turns": turns,
+                "filters": record.get("filters"),
+            })
+
+            if limit and len(conversations) >= limit:
+                break
+
+    logger.info("Loaded %d conversations from %s", len(conversations), path)
+    return conversations
+
+
+def replay_conversation(conversation, vector_db, use_pool=True):
+    """
+    Runs every turn of one conversation through the pipeline in order,
+    carrying session memory between turns like the chat app does.
+    """
+    state = {
+        "conversation_summary": None,
+        "conversation_summary_embedding": None,
+        "current_topic_embedding": None,
+        "topic_memory": TopicMemory(),
+        "candidate_pool": CandidatePool(vector_db) if use_pool else None,
+    }
+
+    records = []
+    for turn_idx, query in enumerate(conversation["turns"]):
+        record = {
+            "conversation_id": conversation["id"],
+            "turn": turn_idx,
+            "query": query,
+        }
+
+        try:
+            result = run_rag_pipeline(
+                user_query=query,
+                llm=llm,
+                embedder=vector_db.embedder,
+                vector_db=vector_db,
+                conversation_summary=state["conversation_summary"],
+                conversation_summary_embedding=state["conversation_summary_embedding"],
+                current_topic_embedding=state["current_topic_embedding"],
+                topic_memory=state["topic_memory"],
+                candidate_pool=state["candidate_pool"],
+                filters=conversation.get("filters"),
+            )
+
+            state["conversation_summary"] = result["conversation_summary"]
+            state["conversation_summary_embedding"] = result["conversation_summary_embedding"]
+            state["current_topic_embedding"] = result["current_topic_embedding"]
+
+            record.update({
+                "answer": result["answer"],
+                "topic_relation": result["topic_relation"],
+                "topic_similarity": float(result["topic_similarity"]),
+                "topic_resumed": result["topic_resumed"],
+                "retrieval_scores": result["retrieval_scores"],
+                "timings": result["timings"],
+            })
+
+        except Exception as e:
+            logger.exception(
+                "Turn %d of conversation %s failed", turn_idx, conversation["id"]
+            )
+            record["error"] = repr(e)
+
+        records.append(record)
+
+    return records
+
+
+# ------------------------------------------------------------------
+# Runner
+# ------------------------------------------------------------------
+def run(conversations, output_path, workers=8, use_pool=True,
+        max_batch=64, max_wait=0.005):
+    vector_db = BatchedVectorDB(max_batch, max_wait)
+    write_lock = threading.Lock()
+
+    turns = 0
+    errors = 0
+    stage_totals = defaultdict(float)
+    started = time.perf_counter()
+
+    with open(output_path, "w", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(replay_conversation, conv, vector_db, use_pool)
+            for conv in conversations
+        ]
+
+        for future in as_completed(futures):
+            records = future.result()
+
+            with write_lock:
+                for record in records:
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+
+            for record in records:
+                turns += 1
+                if "error" in record:
+                    errors += 1
+                for stage, seconds in record.get("timings", {}).items():
+                    stage_totals[stage] += seconds
+
+    elapsed = time.perf_counter() - started
+    ok_turns = max(1, turns - errors)
+
+    logger.info(
+        "Replayed %d conversations / %d turns in %.1fs (%.1f turns/sec), %d errors",
+        len(conversations),
+        turns,
+        elapsed,
+        turns / elapsed if elapsed else 0.0,
+        errors
+    )
+    for stage, seconds in stage_totals.items():
+        logger.info("Mean %-10s %.1f ms", stage, 1000.0 * seconds / ok_turns)
+    log_shard_stats()
+
+
+# ------------------------------------------------------------------
+# Main Execution
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay recorded conversations through the RAG pipeline."
+    )
+    parser.add_argument("input", help="JSONL file of conversations")
+    parser.add_argument("output", help="JSONL file for per-turn results")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument(
+        "--no-pool", action="store_true",
+        help="Disable the per-topic candidate pool"
+    )
+    args = parser.parse_args()
+
+    run(
+        load_conversations(args.input, args.limit),
+        args.output,
+        workers=args.workers,
+        use_pool=not args.no_pool,
+        max_batch=args.max_batch,
+        max_wait=args.max_wait_ms / 1000.0,
+    )
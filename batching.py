@@ -0,0 +1,76 @@
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Micro-Batcher
+# ------------------------------------------------------------------
+class MicroBatcher:
+    """
+    Coalesces single-item calls from many threads into batched calls.
+
+    `batch_fn` receives a list of items and must return one result per
+    item, in order; an exception instance as a result fails only that
+    item. Callers block on `submit(item)` until their result is ready. A batch is flushed when it reaches `max_batch` items or
+    `max_wait` seconds after its first item arrived.
+    """
+
+    def __init__(self, batch_fn, max_batch=64, max_wait=0.005, name="batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            pending = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            try:
+                while len(pending) < self.max_batch:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    pending.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            items = [item for item, _ in pending]
+            logger.debug("Flushing batch of %d", len(items))
+
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(pending, results):
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+            except Exception as e:
+                logger.exception("Batched call failed")
+                for _, future in pending:
+                    future.set_exception(e)
@@ -0,0 +1,146 @@
+import logging
+import numpy as np
+from config import POOL_SIZE, POOL_REFRESH_SCORE
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Candidate Pool
+# ------------------------------------------------------------------
+class CandidatePool:
+    """
+    Topic-scoped cache of the chunks around the current topic.
+
+    Exposes the same `search(query, top_k)` interface as the vector DB
+    adapter. The first search of a topic fetches `pool_size` chunks
+    (content and embeddings) from the vector DB. Same-topic follow-ups
+    are re-ranked locally with a single matrix product, and the vector
+    DB is only queried again when the best local score drops below
+    `refresh_score`.
+    """
+
+    def __init__(
+        self,
+        vector_db,
+        pool_size: int = POOL_SIZE,
+        refresh_score: float = POOL_REFRESH_SCORE
+    ):
+        self.vector_db = vector_db
+        self.pool_size = pool_size
+        self.refresh_score = refresh_score
+        self.reset()
+
+    def reset(self):
+        self.where = None
+        self.version = None         # index version the pool was filled at
+        self.ids = []
+        self.contents = []
+        self.matrix = None          # (n, dim) unit-normalized float32
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _fill(self, query_embedding):
+        logger.info("Filling candidate pool | pool_size=%d", self.pool_size)
+
+        docs = self.vector_db.search_embedding(
+            query_embedding,
+            top_k=self.pool_size,
+            include_embeddings=True,
+            where=self.where
+        )
+
+        self.version = self._index_version()
+        self.ids = [doc["id"] for doc in docs]
+        self.contents = [doc["content"] for doc in docs]
+
+        if docs:
+            matrix = np.asarray(
+                [doc["embedding"] for doc in docs], dtype=np.float32
+            )
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self.matrix = matrix / norms
+        else:
+            self.matrix = None
+
+        logger.info("Candidate pool holds %d chunks", len(self))
+
+    def _rank(self, query_embedding, top_k):
+        if self.matrix is None:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(query)
+        scores = self.matrix @ (query / norm if norm else query)
+
+        top_k = min(top_k, len(scores))
+        top = np.argpartition(-scores, top_k - 1)[:top_k]
+        top = top[np.argsort(-scores[top])]
+
+        return [
+            {
+                "id": self.ids[i],
+                "content": self.contents[i],
+                "score": float(scores[i]),
+            }
+            for i in top
+        ]
+
+    def best_score(self, query_embedding, where=None):
+        """
+        Best pooled score for an embedding, or None when the pool can't
+        serve `where` (cold, other filter, or a newer index version).
+        Pooled chunks are a subset of the index, so this is a lower
+        bound on the best score Chroma would return.
+        """
+        if not len(self) or where != self.where or self._index_version() != self.version:
+            return None
+        docs = self._rank(query_embedding, 1)
+        return docs[0]["score"] if docs else None
+
+    def _index_version(self):
+        index_version = getattr(self.vector_db, "index_version", None)
+        return index_version() if index_version else None
+
+    def search(self, query: str, top_k=5, where=None):
+        # A pool only serves the filter and index version it was filled with
+        if where != self.where or (len(self) and self._index_version() != self.version):
+            self.reset()
+            self.where = where
+
+        query_embedding = self.vector_db.embed(query)
+
+        if not len(self):
+            self._fill(query_embedding)
+            return self._rank(query_embedding, top_k)
+
+        docs = self._rank(query_embedding, top_k)
+        best = docs[0]["score"] if docs else 0.0
+
+        if best < self.refresh_score:
+            logger.info(
+                "Best pooled score %.4f below %.4f — refreshing pool",
+                best,
+                self.refresh_score
+            )
+            self._fill(query_embedding)
+            docs = self._rank(query_embedding, top_k)
+        else:
+            logger.info("Served from candidate pool | best=%.4f", best)
+
+        return docs
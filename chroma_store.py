@@ -1,7 +1,29 @@
+import os
+import re
+import json
+import zlib
+import time
+import heapq
 import logging
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import chromadb
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+from embedding_models import load_embedding_model
+from chunk_batch import ChunkBatch
+from content_store import default_store
+from config import (
+    HNSW_M,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_SEARCH_EF,
+    PARTITION_COLLECTIONS,
+    SHARD_COUNT,
+    SEARCH_FANOUT_THREADS,
+    LAZY_CONTENT,
+    LIVE_OVERFETCH_MAX,
+)
 
 
 # ------------------------------------------------------------------
@@ -20,6 +42,25 @@ if not logger.handlers:
     logger.addHandler(handler)
 
 
+# ------------------------------------------------------------------
+# HNSW Parameters
+# ------------------------------------------------------------------
+def hnsw_metadata(
+    m=HNSW_M,
+    construction_ef=HNSW_CONSTRUCTION_EF,
+    search_ef=HNSW_SEARCH_EF
+):
+    """
+    Builds the collection metadata that configures the HNSW index.
+    """
+    return {
+        "hnsw:space": "cosine",
+        "hnsw:M": m,
+        "hnsw:construction_ef": construction_ef,
+        "hnsw:search_ef": search_ef,
+    }
+
+
 # ------------------------------------------------------------------
 # ChromaDB Client Initialization
 # ------------------------------------------------------------------
@@ -31,7 +72,7 @@ try:
     path=CHROMA_PATH
     )
 
-    embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
+    embedding_model = load_embedding_model()
 
     def embedding_fn(texts):
         return embedding_model.encode(texts).tolist()
@@ -39,15 +80,391 @@ try:
     collection = client.get_or_create_collection(
         name="rag_docs",
         embedding_function=embedding_fn,
-        metadata={"hnsw:space": "cosine"}
+        metadata=hnsw_metadata()
     )
 
     logger.info("ChromaDB collection 'rag_docs' initialized successfully")
+    logger.info("HNSW settings: %s", collection.metadata)
+    logger.info("Shards per collection: %d", SHARD_COUNT)
 
 except Exception as e:
     logger.exception("Failed to initialize ChromaDB client or collection")
     raise
 
+# ------------------------------------------------------------------
+# Partitions & Shards
+# ------------------------------------------------------------------
+# Rows live in "base" collections: rag_docs, or one rag_docs__<group>
+# per source group with PARTITION_COLLECTIONS. With SHARD_COUNT > 1
+# every base is split into <base>-shard<i> collections by a stable hash
+# of the chunk id. Changing either setting requires re-ingesting (or
+# exporting and re-importing a snapshot).
+BASE_COLLECTION = "rag_docs"
+PARTITION_PREFIX = "rag_docs__"
+PARTITION_KEY = "source_group"
+SHARD_SEPARATOR = "-shard"
+
+_collections = {BASE_COLLECTION: collection}
+_collections_lock = threading.Lock()
+_fanout_pool = ThreadPoolExecutor(
+    max_workers=SEARCH_FANOUT_THREADS, thread_name_prefix="shard-search"
+)
+
+
+def _get_collection(name, create=True):
+    """
+    Returns a collection with our HNSW settings. Writes create it on
+    first use; reads (create=False) get None for one that doesn't exist,
+    so arbitrary filter values never create collections.
+    """
+    with _collections_lock:
+        if name not in _collections:
+            if not create:
+                if name not in {c.name for c in client.list_collections()}:
+                    return None
+                _collections[name] = client.get_collection(
+                    name=name, embedding_function=embedding_fn
+                )
+            else:
+                _collections[name] = client.get_or_create_collection(
+                    name=name,
+                    embedding_function=embedding_fn,
+                    metadata=hnsw_metadata()
+                )
+                logger.info("Collection '%s' ready", name)
+        return _collections[name]
+
+
+def _partition_name(group):
+    # Chroma names: 3-63 chars of [A-Za-z0-9_-], alphanumeric at both ends
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", str(group)).strip("_-") or "default"
+    return (PARTITION_PREFIX + safe)[:63 - len(SHARD_SEPARATOR) - 3]
+
+
+def shard_of(chunk_id, shard_count=SHARD_COUNT):
+    return zlib.crc32(chunk_id.encode("utf-8")) % shard_count
+
+
+def _shards(base_name, create=True):
+    """
+    Collections holding a base's rows: the base itself, or its shards.
+    With create=False, only the ones that already exist.
+    """
+    if SHARD_COUNT <= 1:
+        names = [base_name]
+    else:
+        names = [f"{base_name}{SHARD_SEPARATOR}{i}" for i in range(SHARD_COUNT)]
+
+    if create:
+        return [_get_collection(name) for name in names]
+    return [c for c in (_get_collection(name, create=False) for name in names) if c]
+
+
+def _partition_bases():
+    bases = set()
+    for existing in client.list_collections():
+        if existing.name.startswith(PARTITION_PREFIX):
+            bases.add(existing.name.split(SHARD_SEPARATOR)[0])
+    return sorted(bases)
+
+
+def all_collections():
+    """
+    Every collection currently holding chunks.
+    """
+    if not PARTITION_COLLECTIONS:
+        return _shards(BASE_COLLECTION, create=False)
+    return [c for base in _partition_bases() for c in _shards(base, create=False)]
+
+
+def _group_of_filter(where):
+    """
+    The source_group a Chroma `where` filter pins by equality (at the
+    top level or inside a top-level $and), or None.
+    """
+    if not where:
+        return None
+
+    def group_of(clause):
+        value = clause.get(PARTITION_KEY) if len(clause) == 1 else None
+        if isinstance(value, dict) and set(value) == {"$eq"}:
+            value = value["$eq"]
+        return value if isinstance(value, str) else None
+
+    group = group_of(where)
+    if group is None and set(where) == {"$and"}:
+        group = next(
+            (g for g in map(group_of, where["$and"]) if g is not None), None
+        )
+    return group
+
+
+def _search_targets(where):
+    """
+    Collections a query must visit, each with the filter to apply there.
+    A group filter picks that group's partition but is still applied
+    inside it: sanitised and truncated names can collide.
+    """
+    if not PARTITION_COLLECTIONS:
+        return [(shard, where or None) for shard in _shards(BASE_COLLECTION, create=False)]
+
+    group = _group_of_filter(where)
+    if group is not None:
+        return [(shard, where) for shard in _shards(_partition_name(group), create=False)]
+
+    return [(c, where or None) for c in all_collections()]
+
+
+def _write_targets(chunk_batch):
+    """
+    Splits a batch into (collection, rows) pairs by partition and shard.
+    """
+    if PARTITION_COLLECTIONS and chunk_batch.metadatas:
+        bases = {}
+        for i, metadata in enumerate(chunk_batch.metadatas):
+            group = (metadata or {}).get(PARTITION_KEY, "default")
+            bases.setdefault(_partition_name(group), []).append(i)
+    else:
+        bases = {BASE_COLLECTION: range(len(chunk_batch))}
+
+    targets = []
+    for base, indices in bases.items():
+        shards = _shards(base)
+        if len(shards) == 1:
+            rows = chunk_batch if len(indices) == len(chunk_batch) else chunk_batch.take(indices)
+            targets.append((shards[0], rows))
+            continue
+
+        by_shard = {}
+        for i in indices:
+            by_shard.setdefault(shard_of(chunk_batch.ids[i]), []).append(i)
+        for shard_idx, shard_rows in by_shard.items():
+            targets.append((shards[shard_idx], chunk_batch.take(shard_rows)))
+
+    return targets
+
+
+# ------------------------------------------------------------------
+# Shard Latency Stats
+# ------------------------------------------------------------------
+_latencies = defaultdict(lambda: deque(maxlen=1000))
+_latencies_lock = threading.Lock()
+
+
+def _record_latency(name, seconds):
+    with _latencies_lock:
+        _latencies[name].append(seconds)
+
+
+def shard_stats():
+    """
+    Shard count and recent per-collection query latency.
+    """
+    with _latencies_lock:
+        per_collection = {
+            name: {
+                "queries": len(samples),
+                "p50_ms": 1000.0 * float(np.percentile(samples, 50)),
+                "p95_ms": 1000.0 * float(np.percentile(samples, 95)),
+            }
+            for name, samples in _latencies.items()
+            if samples
+        }
+    return {"shard_count": SHARD_COUNT, "collections": per_collection}
+
+
+def log_shard_stats():
+    stats = shard_stats()
+    for name, row in sorted(stats["collections"].items()):
+        logger.info(
+            "Shard %-32s queries=%d p50=%.1fms p95=%.1fms",
+            name,
+            row["queries"],
+            row["p50_ms"],
+            row["p95_ms"]
+        )
+    return stats
+
+
+# ------------------------------------------------------------------
+# Index Versions
+# ------------------------------------------------------------------
+# Live updates (live_index.py) stamp every row they write with the
+# version they are going to publish. A search reads one view of the
+# version state and drops, on every shard:
+#   - rows newer than the published version (pending or failed), and
+#   - rows of a source that a later published update replaced.
+# So it sees either all of an update or none of it. Rows without the
+# key are version 0. The state (published, highest reserved, and
+# replaced sources not yet deleted) survives restarts in VERSION_FILE.
+VERSION_KEY = "index_version"
+VERSION_FILE = os.path.join(CHROMA_PATH, "index_version.json")
+
+
+def _load_version_state():
+    try:
+        with open(VERSION_FILE, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = {}
+
+    published = int(state.get("published", 0))
+    reserved = max(published, int(state.get("reserved", published)))
+    superseded = {
+        source: int(version)
+        for source, version in state.get("superseded", {}).items()
+    }
+    return published, reserved, superseded
+
+
+_version_lock = threading.Lock()
+_published_version, _reserved_version, _superseded = _load_version_state()
+_pending_version = None
+_pending_rows = 0
+
+
+def _save_version_state():
+    # Caller holds _version_lock
+    with open(VERSION_FILE + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "published": _published_version,
+            "reserved": _reserved_version,
+            "superseded": _superseded,
+        }, f)
+    os.replace(VERSION_FILE + ".tmp", VERSION_FILE)
+
+
+def index_version():
+    """
+    Published index version; changes whenever a live update lands.
+    """
+    return _published_version
+
+
+def is_visible(metadata, view):
+    published, _, superseded = view
+    metadata = metadata or {}
+    version = metadata.get(VERSION_KEY, 0)
+    if version > published:
+        return False
+    replaced_at = superseded.get(metadata.get("source"))
+    return replaced_at is None or version >= replaced_at
+
+
+def begin_version():
+    """
+    Reserves the next version for one live update. The reservation is
+    persisted, so a number is never handed out twice, and leftover rows
+    of updates that never published are deleted first.
+    """
+    global _reserved_version, _pending_version, _pending_rows
+    with _version_lock:
+        if _pending_version is not None:
+            raise RuntimeError(f"Index version {_pending_version} is still pending")
+        _reserved_version += 1
+        _pending_version = _reserved_version
+        _pending_rows = 0
+        _save_version_state()
+        version, published = _pending_version, _published_version
+
+    for stored in all_collections():
+        stored.delete(where={VERSION_KEY: {"$gt": published}})
+    return version
+
+
+def add_pending_rows(count):
+    # Counted before the rows are written, so searches over-fetch enough
+    global _pending_rows
+    with _version_lock:
+        _pending_rows += count
+
+
+def publish_version(version, replaces=()):
+    """
+    Makes every row stamped with `version` visible at once, and hides
+    older rows of the `replaces` sources in the same step. Those rows
+    are deleted afterwards.
+    """
+    global _published_version, _pending_version, _pending_rows
+    with _version_lock:
+        if version != _pending_version:
+            raise RuntimeError(f"Index version {version} is not pending")
+
+        _published_version = version
+        for source in replaces:
+            _superseded[source] = version
+        _pending_version = None
+        _pending_rows = 0
+        _save_version_state()
+
+    logger.info("Published index version %d", version)
+
+    for source in replaces:
+        _delete_replaced(source, version)
+
+
+def _delete_replaced(source, version):
+    try:
+        for stored in all_collections():
+            # Offline-ingested rows have no VERSION_KEY, which a `where`
+            # comparison would skip, so compare here
+            rows = stored.get(where={"source": source}, include=["metadatas"])
+            old = [
+                chunk_id
+                for chunk_id, metadata in zip(rows["ids"], rows["metadatas"])
+                if (metadata or {}).get(VERSION_KEY, 0) < version
+            ]
+            if old:
+                stored.delete(ids=old)
+    except Exception:
+        # Still hidden through _superseded; retried on the next restart
+        logger.exception("Failed to delete replaced rows of %s", source)
+        return
+
+    with _version_lock:
+        if _superseded.get(source) == version:
+            del _superseded[source]
+            _save_version_state()
+
+
+def abandon_version(version):
+    """
+    Drops a failed update and deletes the rows it had written.
+    """
+    global _pending_version, _pending_rows
+    with _version_lock:
+        if version == _pending_version:
+            _pending_version = None
+            _pending_rows = 0
+    logger.warning("Abandoned index version %d", version)
+
+    try:
+        for stored in all_collections():
+            stored.delete(where={VERSION_KEY: version})
+    except Exception:
+        # begin_version removes them before the next update
+        logger.exception("Failed to delete rows of abandoned version %d", version)
+
+
+def version_view():
+    """
+    (published version, rows to over-fetch, replaced sources): one
+    consistent view for a search or export, used with is_visible.
+    """
+    with _version_lock:
+        extra = min(_pending_rows, LIVE_OVERFETCH_MAX) if _pending_version else 0
+        return _published_version, extra, dict(_superseded)
+
+
+def retry_replaced():
+    """
+    Deletes old rows of replacements that were published but not
+    cleaned up before a restart (they stay hidden until then).
+    """
+    for source, version in list(_superseded.items()):
+        _delete_replaced(source, version)
+
+
 # ------------------------------------------------------------------
 # Batch Helper
 # ------------------------------------------------------------------
@@ -55,50 +472,91 @@ def batch(iterable, size):
     for i in range(0, len(iterable), size):
         yield iterable[i:i + size]
 
+# ------------------------------------------------------------------
+# Write Helpers
+# ------------------------------------------------------------------
+DEFAULT_MAX_BATCH_SIZE = 5461
+
+
+def max_batch_size():
+    """
+    Largest batch the Chroma client accepts in a single call.
+    """
+    return getattr(client, "max_batch_size", None) or DEFAULT_MAX_BATCH_SIZE
+
+
+def _as_list(embedding):
+    return embedding.tolist() if hasattr(embedding, "tolist") else embedding
+
+
+def write_batch(chunk_batch):
+    """
+    Upserts one embedded ChunkBatch and returns the time it took.
+    This is the only place embeddings are converted to Python lists.
+    """
+    start = time.perf_counter()
+
+    if LAZY_CONTENT:
+        default_store().append(chunk_batch.ids, chunk_batch.contents)
+
+    for target, rows in _write_targets(chunk_batch):
+        target.upsert(
+            ids=rows.ids,
+            documents=None if LAZY_CONTENT else rows.contents,
+            embeddings=rows.embeddings_as_lists(),
+            metadatas=rows.metadatas,
+        )
+
+    return time.perf_counter() - start
+
+
 # ------------------------------------------------------------------
 # Add Documents
 # ------------------------------------------------------------------
 def add_documents(documents, batch_size=100):
     """
     Adds documents to the ChromaDB collection in batches.
+    Uses upsert, so re-running ingestion is idempotent.
 
     Args:
-        documents (list): List of dicts with keys: id, content, embedding
+        documents (ChunkBatch | list): Embedded ChunkBatch, or list of
+            dicts with keys: id, content, embedding
         batch_size (int): Max batch size for ChromaDB
     """
     logger.info("add_documents called")
     logger.debug("Number of documents received: %d", len(documents))
 
-    if not documents:
+    if not len(documents):
         logger.warning("No documents to add")
         return
 
+    if not isinstance(documents, ChunkBatch):
+        documents = ChunkBatch.from_dicts(documents)
+
     total = len(documents)
+    batch_size = min(batch_size, max_batch_size())
+    started = time.perf_counter()
 
     try:
         for start_idx in range(0, total, batch_size):
-            end_idx = start_idx + batch_size
-            batch_docs = documents[start_idx:end_idx]
+            end_idx = min(start_idx + batch_size, total)
+            batch_docs = documents.take(range(start_idx, end_idx))
 
             logger.info(
                 "Inserting batch %d–%d (%d docs)",
                 start_idx,
-                min(end_idx, total),
+                end_idx,
                 len(batch_docs),
             )
 
-            collection.add(
-                ids=[doc["id"] for doc in batch_docs],
-                documents=[doc["content"] for doc in batch_docs],
-                embeddings=[
-                    doc["embedding"].tolist()
-                    if hasattr(doc["embedding"], "tolist")
-                    else doc["embedding"]
-                    for doc in batch_docs
-                ],
-            )
+            write_batch(batch_docs)
 
-        logger.info("Successfully added %d documents to collection", total)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Successfully added %d documents to collection (%.1f rows/sec)",
+            total,
+            total / elapsed if elapsed else float("inf")
+        )
 
     except KeyError as e:
         logger.exception("Document schema error. Missing key: %s", str(e))
@@ -109,41 +567,308 @@ def add_documents(documents, batch_size=100):
         raise
 
 
+# ------------------------------------------------------------------
+# Pipelined Embed + Write
+# ------------------------------------------------------------------
+def add_documents_pipelined(chunks, embed_fn, batch_size=128):
+    """
+    Embeds and upserts chunks, overlapping the embedding of batch N+1
+    with the write of batch N on a background writer thread.
+
+    The batch size doubles while throughput keeps improving, capped at
+    the client's maximum batch size.
+
+    Args:
+        chunks (iterable): Dicts with keys: id, content
+        embed_fn (callable): Maps a list of texts to a 2D array
+        batch_size (int): Initial batch size
+
+    Returns:
+        int: Number of rows written
+    """
+    logger.info("add_documents_pipelined called | batch_size=%d", batch_size)
+
+    limit = max_batch_size()
+    batch_size = min(batch_size, limit)
+
+    total = 0
+    embed_seconds = 0.0
+    write_seconds = 0.0
+    best_rate = 0.0
+    started = time.perf_counter()
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="chroma-writer"
+        ) as writer:
+            pending = None
+
+            for batch_docs in ChunkBatch.iter_batches(chunks, lambda: batch_size):
+                embed_start = time.perf_counter()
+                batch_docs = batch_docs.with_embeddings(embed_fn(batch_docs.contents))
+                batch_embed = time.perf_counter() - embed_start
+                embed_seconds += batch_embed
+
+                # Wait for the previous write before queuing the next one
+                if pending is not None:
+                    prev_count, prev_future = pending
+                    batch_write = prev_future.result()
+                    write_seconds += batch_write
+                    total += prev_count
+
+                    # Cycle time is bounded by the slower of the two stages;
+                    # each rate uses its own batch (they differ after a doubling)
+                    rate = min(
+                        len(batch_docs) / max(batch_embed, 1e-9),
+                        prev_count / max(batch_write, 1e-9)
+                    )
+                    if rate > best_rate * 1.05 and batch_size * 2 <= limit:
+                        best_rate = rate
+                        batch_size *= 2
+                        logger.info("Batch size increased to %d", batch_size)
+                    else:
+                        best_rate = max(best_rate, rate)
+
+                pending = (len(batch_docs), writer.submit(write_batch, batch_docs))
+
+            if pending is not None:
+                write_seconds += pending[1].result()
+                total += pending[0]
+
+    except KeyError as e:
+        logger.exception("Document schema error. Missing key: %s", str(e))
+        raise
+
+    except Exception:
+        logger.exception("Pipelined ingestion failed")
+        raise
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Upserted %d rows in %.2fs (%.1f rows/sec) | embed=%.2fs write=%.2fs",
+        total,
+        elapsed,
+        total / elapsed if elapsed else float("inf"),
+        embed_seconds,
+        write_seconds
+    )
+
+    return total
+
+
+# ------------------------------------------------------------------
+# Stale Rows
+# ------------------------------------------------------------------
+def prune_source(source, keep_ids):
+    """
+    Deletes the rows of one source file whose ids are not in `keep_ids`
+    and returns how many were removed. The kept rows are the source's
+    current ones, so any pending live replacement of it is cleared too
+    (it would hide, then delete, these unversioned rows).
+    """
+    removed = 0
+    for stored in all_collections():
+        stale = [
+            chunk_id
+            for chunk_id in stored.get(where={"source": source}, include=[])["ids"]
+            if chunk_id not in keep_ids
+        ]
+        if stale:
+            stored.delete(ids=stale)
+            removed += len(stale)
+
+    with _version_lock:
+        if _superseded.pop(source, None) is not None:
+            _save_version_state()
+
+    if removed:
+        logger.info("Pruned %d stale chunks of %s", removed, source)
+    return removed
+
+
+# Ids of the original ingest scheme (a global counter), written without
+# metadata, so prune_source cannot find them by source
+LEGACY_ID_PATTERN = re.compile(r"doc_\d+")
+
+
+def prune_legacy_rows():
+    """
+    Deletes rows left by the doc_<n> id scheme (no `source` metadata)
+    and returns how many were removed. Only needed once after
+    upgrading; later runs find nothing.
+    """
+    removed = 0
+    page_size = max_batch_size()
+    for stored in all_collections():
+        legacy = []
+        for offset in range(0, stored.count(), page_size):
+            page = stored.get(limit=page_size, offset=offset, include=["metadatas"])
+            metadatas = page["metadatas"] or [None] * len(page["ids"])
+            legacy.extend(
+                chunk_id
+                for chunk_id, metadata in zip(page["ids"], metadatas)
+                if not (metadata or {}).get("source")
+                and LEGACY_ID_PATTERN.fullmatch(chunk_id)
+            )
+        # Deleted after paging, so the offsets stay valid
+        for start_idx in range(0, len(legacy), page_size):
+            stored.delete(ids=legacy[start_idx:start_idx + page_size])
+        removed += len(legacy)
+
+    if removed:
+        logger.info("Pruned %d chunks of the old doc_<n> id scheme", removed)
+    return removed
+
 
 # ------------------------------------------------------------------
 # Search
 # ------------------------------------------------------------------
-def search(query_embedding, top_k=5):
+def search(query_embedding, top_k=5, include_embeddings=False, where=None):
     """
     Searches the ChromaDB collection using an embedding.
 
     Args:
         query_embedding (list): Query embedding vector
         top_k (int): Number of results to return
+        include_embeddings (bool): Also return each hit's embedding
+        where (dict): Optional Chroma metadata filter, e.g.
+            {"source_group": "billing"}
 
     Returns:
-        list: List of documents with content and similarity score
+        list: List of documents with id, content, metadata and
+            similarity score
     """
     logger.info("search called with top_k=%d", top_k)
+    return search_many([query_embedding], top_k, include_embeddings, where)[0]
 
-    try:
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=top_k
+
+def search_many(query_embeddings, top_k=5, include_embeddings=False, where=None):
+    """
+    Runs several embedding searches in a single ChromaDB query.
+
+    Returns:
+        list: One list of documents per query embedding
+    """
+    return [
+        batch.to_dicts()
+        for batch in search_batches(query_embeddings, top_k, include_embeddings, where)
+    ]
+
+
+def _query_collection(target, query_embeddings, top_k, include_embeddings, where,
+                      view=None):
+    # With LAZY_CONTENT the text lives in the content store instead
+    include = ["metadatas", "distances"]
+    if not LAZY_CONTENT:
+        include.append("documents")
+    if include_embeddings:
+        include.append("embeddings")
+
+    n_results = top_k + (view[1] if view else 0)
+    started = time.perf_counter()
+
+    while True:
+        results = target.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            where=where,
+            include=include
         )
 
-        docs = []
-        num_results = len(results["documents"][0])
-        logger.debug("Number of results retrieved: %d", num_results)
+        batches = []
+        for q in range(len(query_embeddings)):
+            logger.debug("Number of results retrieved: %d", len(results["ids"][q]))
+            ids = results["ids"][q]
+            batch_q = ChunkBatch(
+                ids,
+                [None] * len(ids) if LAZY_CONTENT else results["documents"][q],
+                results["embeddings"][q] if include_embeddings else None,
+                1.0 - np.asarray(results["distances"][q], dtype=np.float32),
+                results["metadatas"][q],
+            )
+
+            if view is not None:
+                # Hide unpublished and replaced rows of live updates
+                visible = [
+                    i for i, metadata in enumerate(batch_q.metadatas)
+                    if is_visible(metadata, view)
+                ]
+                batch_q = batch_q.take(visible[:top_k])
+
+            batches.append(batch_q)
+
+        # Hidden rows left a query short while more rows exist: go deeper
+        short = any(
+            len(batches[q]) < top_k and len(results["ids"][q]) == n_results
+            for q in range(len(query_embeddings))
+        )
+        if view is None or not short:
+            break
+        n_results *= 2
+
+    _record_latency(target.name, time.perf_counter() - started)
+    return batches
+
+
+def merge_top_k(batches, top_k):
+    """
+    Merges per-collection results for one query into a global top-k
+    with a heap over all candidates.
+    """
+    merged = ChunkBatch.concat(batches)
+    if not len(merged):
+        return merged
+    best = heapq.nlargest(top_k, range(len(merged)), key=merged.scores.__getitem__)
+    return merged.take(best)
+
+
+def search_batches(query_embeddings, top_k=5, include_embeddings=False, where=None):
+    """
+    Same as search_many, but returns one ChunkBatch per query, with
+    scores (and embeddings) as float32 arrays.
+
+    Queries every shard (and, with PARTITION_COLLECTIONS, every
+    partition the filter allows) in parallel and merges the per-shard
+    top-k lists into the global top-k. Rows of an unpublished live
+    update are never returned.
+    """
+    logger.debug("search_batches called | queries=%d", len(query_embeddings))
+
+    try:
+        query_embeddings = [_as_list(e) for e in query_embeddings]
+        targets = _search_targets(where)
+        if not targets:
+            logger.info("No collection matches the filter — nothing to search")
+            return [ChunkBatch([], []) for _ in query_embeddings]
+        # One view for every shard, so they all agree on the version
+        view = version_view()
+
+        if len(targets) == 1:
+            target, target_where = targets[0]
+            batches = _query_collection(
+                target, query_embeddings, top_k, include_embeddings, target_where, view
+            )
+        else:
+            started = time.perf_counter()
+            per_target = list(_fanout_pool.map(
+                lambda t: _query_collection(
+                    t[0], query_embeddings, top_k, include_embeddings, t[1], view
+                ),
+                targets
+            ))
+            logger.info(
+                "Scatter-gather over %d collections in %.1fms",
+                len(targets),
+                1000.0 * (time.perf_counter() - started)
+            )
 
-        for i in range(num_results):
-            docs.append({
-                "content": results["documents"][0][i],
-                "score": 1 - results["distances"][0][i]
-            })
+            batches = [
+                merge_top_k([results[q] for results in per_target], top_k)
+                for q in range(len(query_embeddings))
+            ]
 
         logger.info("Search completed successfully")
-        return docs
+        return batches
 
     except Exception as e:
         logger.exception("Search operation failed")
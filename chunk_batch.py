@@ -0,0 +1,134 @@
+import itertools
+import numpy as np
+
+
+# ------------------------------------------------------------------
+# Chunk Batch
+# ------------------------------------------------------------------
+class ChunkBatch:
+    """
+    Columnar batch of chunks.
+
+    IDs and contents are plain lists; embeddings (when present) are a
+    single (n, dim) float32 array instead of n Python lists of floats,
+    and search scores are a float32 vector. Conversion to Chroma's list
+    format happens only in chroma_store.
+    """
+
+    __slots__ = ("ids", "contents", "embeddings", "scores", "metadatas")
+
+    def __init__(self, ids, contents, embeddings=None, scores=None, metadatas=None):
+        self.ids = list(ids)
+        self.contents = list(contents)
+        self.embeddings = (
+            None if embeddings is None
+            else np.ascontiguousarray(embeddings, dtype=np.float32)
+        )
+        self.scores = None if scores is None else np.asarray(scores, dtype=np.float32)
+        self.metadatas = None if metadatas is None else list(metadatas)
+
+        if self.embeddings is not None and len(self.embeddings) != len(self.ids):
+            raise ValueError("embeddings and ids differ in length")
+        if len(self.contents) != len(self.ids):
+            raise ValueError("contents and ids differ in length")
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --------------------------------------------------------------
+    # Construction
+    # --------------------------------------------------------------
+    @classmethod
+    def from_dicts(cls, chunks):
+        """
+        Builds a batch from {id, content[, embedding][, metadata]} dicts.
+        """
+        chunks = list(chunks)
+        embeddings = None
+        if chunks and "embedding" in chunks[0]:
+            embeddings = np.asarray(
+                [chunk["embedding"] for chunk in chunks], dtype=np.float32
+            )
+        metadatas = None
+        if chunks and "metadata" in chunks[0]:
+            metadatas = [chunk["metadata"] for chunk in chunks]
+        return cls(
+            [chunk["id"] for chunk in chunks],
+            [chunk["content"] for chunk in chunks],
+            embeddings,
+            metadatas=metadatas,
+        )
+
+    @classmethod
+    def iter_batches(cls, chunks, size):
+        """
+        Groups an iterable of chunk dicts into batches of `size`.
+        `size` may be a callable, re-read before every batch.
+        """
+        chunks = iter(chunks)
+        while True:
+            group = list(itertools.islice(chunks, size() if callable(size) else size))
+            if not group:
+                return
+            yield cls.from_dicts(group)
+
+    @classmethod
+    def concat(cls, batches):
+        batches = [b for b in batches if len(b)]
+        if not batches:
+            return cls([], [])
+
+        def joined(attr):
+            parts = [getattr(b, attr) for b in batches]
+            return None if any(p is None for p in parts) else np.concatenate(parts)
+
+        def chained(attr):
+            parts = [getattr(b, attr) for b in batches]
+            return None if any(p is None for p in parts) else list(itertools.chain(*parts))
+
+        return cls(
+            chained("ids"),
+            chained("contents"),
+            joined("embeddings"),
+            joined("scores"),
+            chained("metadatas"),
+        )
+
+    def with_embeddings(self, embeddings):
+        return ChunkBatch(self.ids, self.contents, embeddings, self.scores, self.metadatas)
+
+    def take(self, indices):
+        """
+        Returns the rows at `indices`, in that order.
+        """
+        indices = list(indices)
+        return ChunkBatch(
+            [self.ids[i] for i in indices],
+            [self.contents[i] for i in indices],
+            None if self.embeddings is None else self.embeddings[indices],
+            None if self.scores is None else self.scores[indices],
+            None if self.metadatas is None else [self.metadatas[i] for i in indices],
+        )
+
+    # --------------------------------------------------------------
+    # Boundaries
+    # --------------------------------------------------------------
+    def embeddings_as_lists(self):
+        return None if self.embeddings is None else self.embeddings.tolist()
+
+    def to_dicts(self):
+        """
+        Per-chunk dicts for the pipeline (id, content, score and, when
+        present, the embedding row as an array view).
+        """
+        docs = []
+        for i, chunk_id in enumerate(self.ids):
+            doc = {"id": chunk_id, "content": self.contents[i]}
+            if self.scores is not None:
+                doc["score"] = float(self.scores[i])
+            if self.embeddings is not None:
+                doc["embedding"] = self.embeddings[i]
+            if self.metadatas is not None and self.metadatas[i]:
+                doc["metadata"] = self.metadatas[i]
+            docs.append(doc)
+        return docs
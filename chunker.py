@@ -0,0 +1,141 @@
+import re
+import logging
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Constants
+# ------------------------------------------------------------------
+# all-MiniLM-L6-v2 truncates at 256 word pieces; leave room for
+# the special tokens and a little slack.
+CHUNK_MAX_TOKENS = 200
+CHUNK_OVERLAP_TOKENS = 32
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+# ------------------------------------------------------------------
+# Token Counting
+# ------------------------------------------------------------------
+def make_token_counter(model=None):
+    """
+    Returns a function counting tokens with the model's tokenizer,
+    or whitespace-separated words when no tokenizer is available.
+    """
+    tokenizer = getattr(model, "tokenizer", None)
+
+    if tokenizer is None:
+        logger.warning("No tokenizer available — counting words instead")
+        return lambda text: len(text.split())
+
+    return lambda text: len(tokenizer.tokenize(text))
+
+
+# ------------------------------------------------------------------
+# Sentence Splitting
+# ------------------------------------------------------------------
+def split_sentences(text):
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = " ".join(sentence.split())
+        if sentence:
+            yield sentence
+
+
+def _fit(sentence, count_tokens, max_tokens):
+    """
+    Yields (piece, tokens) pairs, breaking sentences longer than
+    `max_tokens` on word boundaries.
+    """
+    tokens = count_tokens(sentence)
+    if tokens <= max_tokens:
+        yield sentence, tokens
+        return
+
+    words = []
+    words_tokens = 0
+    for word in sentence.split():
+        word_tokens = count_tokens(word)
+        if words and words_tokens + word_tokens > max_tokens:
+            yield " ".join(words), words_tokens
+            words, words_tokens = [], 0
+        words.append(word)
+        words_tokens += word_tokens
+
+    if words:
+        yield " ".join(words), words_tokens
+
+
+def _emit(buffer):
+    return {
+        "content": " ".join(piece for piece, _, _ in buffer),
+        "page_start": buffer[0][2],
+        "page_end": buffer[-1][2],
+    }
+
+
+# ------------------------------------------------------------------
+# Streaming Chunker
+# ------------------------------------------------------------------
+def chunk_pages(
+    pages,
+    count_tokens,
+    max_tokens=CHUNK_MAX_TOKENS,
+    overlap_tokens=CHUNK_OVERLAP_TOKENS
+):
+    """
+    Packs sentences into chunks of at most `max_tokens` tokens.
+
+    Args:
+        pages (iterable): (page_number, text) pairs, consumed lazily
+        count_tokens (callable): Maps text to its token count
+        max_tokens (int): Token budget per chunk
+        overlap_tokens (int): Trailing tokens repeated in the next chunk
+
+    Yields:
+        dict: content, page_start, page_end
+    """
+    buffer = []  # (piece, tokens, page_number)
+    buffer_tokens = 0
+    fresh = False
+
+    for page_number, text in pages:
+        for sentence in split_sentences(text):
+            for piece, tokens in _fit(sentence, count_tokens, max_tokens):
+                if fresh and buffer_tokens + tokens > max_tokens:
+                    yield _emit(buffer)
+                    fresh = False
+
+                    # Keep the trailing sentences as overlap
+                    tail = []
+                    tail_tokens = 0
+                    for item in reversed(buffer):
+                        if tail_tokens + item[1] > overlap_tokens:
+                            break
+                        tail.insert(0, item)
+                        tail_tokens += item[1]
+                    buffer, buffer_tokens = tail, tail_tokens
+
+                while buffer and buffer_tokens + tokens > max_tokens:
+                    buffer_tokens -= buffer.pop(0)[1]
+
+                buffer.append((piece, tokens, page_number))
+                buffer_tokens += tokens
+                fresh = True
+
+    # The tail is kept however short it is
+    if fresh:
+        yield _emit(buffer)
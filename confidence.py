@@ -1,5 +1,5 @@
 import logging
-from config import MIN_RETRIEVAL_SCORE
+from config import MIN_RETRIEVAL_SCORE, PRECHECK_MARGIN
 
 # ------------------------------------------------------------------
 # Logging Configuration
@@ -51,3 +51,24 @@ def is_confident(retrieved_docs: list[dict]) -> bool:
     except Exception:
         logger.exception("Unexpected error during confidence evaluation")
         raise
+
+
+# ------------------------------------------------------------------
+# Pre-LLM Confidence Check
+# ------------------------------------------------------------------
+def is_hopeless(best_case_scores: list[float]) -> bool:
+    """
+    Cheap check run before any LLM call. Returns True when even the
+    best raw retrieval score is far below the confidence threshold,
+    so a rewrite could not plausibly rescue the turn.
+    """
+    best_score = max(best_case_scores, default=0.0)
+    cutoff = MIN_RETRIEVAL_SCORE - PRECHECK_MARGIN
+
+    logger.info(
+        "Pre-check best score: %.4f | Cutoff: %.4f",
+        best_score,
+        cutoff
+    )
+
+    return best_score < cutoff
@@ -1,5 +1,52 @@
 SAME_TOPIC_THRESHOLD = 0.75
 PARTIAL_TOPIC_THRESHOLD = 0.40
+PROMOTE_PARTIAL_THRESHOLD = 0.65
+
+# Number of earlier topics remembered per conversation
+TOPIC_MEMORY_SIZE = 8
 
 MIN_RETRIEVAL_SCORE = 0.35
-TOP_K = 5
\ No newline at end of file
+# Turns whose raw best score is this far below MIN_RETRIEVAL_SCORE are
+# rejected before the query-rewrite LLM call.
+PRECHECK_MARGIN = 0.10
+TOP_K = 5
+
+# Ask for the answer and the updated conversation summary in one JSON
+# LLM reply; falls back to a separate summary call if it can't be parsed.
+FUSED_ANSWER_SUMMARY = False
+
+# Per-topic candidate pool: chunks fetched once per topic and re-ranked
+# locally; Chroma is queried again when the best local score drops
+# below POOL_REFRESH_SCORE.
+POOL_SIZE = 300
+POOL_REFRESH_SCORE = 0.45
+
+# Stored with every chunk; bump when chunking or embedding changes
+INGEST_VERSION = 2
+
+# Store each source group (top-level folder under data/) in its own
+# collection, so queries scoped to one group search only that index.
+PARTITION_COLLECTIONS = False
+
+# Hash-partition every collection into this many shards (1 = off);
+# queries fan out to all shards in parallel.
+SHARD_COUNT = 1
+SEARCH_FANOUT_THREADS = 8
+
+# Keep chunk text out of Chroma: ingest appends it to a memory-mapped
+# file under CONTENT_STORE_PATH, searches return ids/scores only, and
+# text is read for just the chunks passed to the LLM.
+LAZY_CONTENT = False
+CONTENT_STORE_PATH = "content_store/"
+
+# Live index updates from the serving process (live_index.py). While
+# an update is pending, searches fetch up to LIVE_OVERFETCH_MAX extra
+# rows to make up for the not-yet-visible ones they filter out.
+LIVE_INGEST_BATCH_SIZE = 128
+LIVE_OVERFETCH_MAX = 1000
+
+# HNSW index parameters for the rag_docs collection.
+# Chroma only applies these when the collection is first created.
+HNSW_M = 16
+HNSW_CONSTRUCTION_EF = 100
+HNSW_SEARCH_EF = 10
@@ -0,0 +1,176 @@
+import os
+import json
+import mmap
+import logging
+import threading
+
+from config import CONTENT_STORE_PATH
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Layout
+# ------------------------------------------------------------------
+# <dir>/content.bin   UTF-8 chunk texts, back to back, append-only
+# <dir>/content.idx   one JSON line per write: [id, offset, length]
+#                     (later lines win, so re-ingesting an id appends)
+TEXT_FILE = "content.bin"
+INDEX_FILE = "content.idx"
+
+
+# ------------------------------------------------------------------
+# Content Store
+# ------------------------------------------------------------------
+class ContentStore:
+    """
+    Chunk text kept outside the vector index, read through mmap.
+
+    Every lookup first reads any new tail of the index (a size check
+    when nothing changed), so rows appended or replaced by another
+    process are seen; the text file is remapped when it has grown.
+    """
+
+    def __init__(self, path=CONTENT_STORE_PATH):
+        self.path = path
+        self.text_path = os.path.join(path, TEXT_FILE)
+        self.index_path = os.path.join(path, INDEX_FILE)
+
+        self.offsets = {}           # id -> (offset, length)
+        self.index_position = 0     # bytes of the index already read
+        self.mapped = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            self._refresh()
+            return len(self.offsets)
+
+    # --------------------------------------------------------------
+    # Reading
+    # --------------------------------------------------------------
+    def _refresh(self):
+        try:
+            index_size = os.path.getsize(self.index_path)
+        except OSError:
+            return
+        if index_size == self.index_position:
+            return
+
+        with open(self.index_path, "rb") as f:
+            f.seek(self.index_position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break       # a writer is mid-line; pick it up next time
+                chunk_id, offset, length = json.loads(line)
+                self.offsets[chunk_id] = (offset, length)
+                self.index_position += len(line)
+
+        size = os.path.getsize(self.text_path) if os.path.exists(self.text_path) else 0
+        if size and (self.mapped is None or len(self.mapped) < size):
+            with open(self.text_path, "rb") as f:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_many(self, ids):
+        """
+        Returns the text for each id (None for unknown ids).
+        """
+        with self.lock:
+            self._refresh()
+
+            texts = []
+            for chunk_id in ids:
+                location = self.offsets.get(chunk_id)
+                if location is None:
+                    texts.append(None)
+                    continue
+                offset, length = location
+                if not length:
+                    texts.append("")
+                    continue
+                texts.append(self.mapped[offset:offset + length].decode("utf-8"))
+            return texts
+
+    def get(self, chunk_id):
+        return self.get_many([chunk_id])[0]
+
+    # --------------------------------------------------------------
+    # Writing
+    # --------------------------------------------------------------
+    def append(self, ids, contents):
+        """
+        Appends texts and their index entries. Text is flushed before
+        the index, so readers never see an entry without its bytes.
+        """
+        with self.lock:
+            os.makedirs(self.path, exist_ok=True)
+
+            entries = []
+            with open(self.text_path, "ab") as f:
+                offset = f.tell()
+                for chunk_id, content in zip(ids, contents):
+                    data = content.encode("utf-8")
+                    f.write(data)
+                    entries.append([chunk_id, offset, len(data)])
+                    offset += len(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            with open(self.index_path, "ab") as f:
+                f.write("".join(json.dumps(e) + "\n" for e in entries).encode("utf-8"))
+                f.flush()
+
+            # Visible to this process right away; _refresh re-reading
+            # these lines later sets the same values
+            for chunk_id, offset, length in entries:
+                self.offsets[chunk_id] = (offset, length)
+
+            logger.debug("Appended %d chunks to the content store", len(entries))
+
+
+_default_store = None
+_default_lock = threading.Lock()
+
+
+def default_store():
+    """
+    The process-wide store at CONTENT_STORE_PATH, opened on first use
+    (so forked workers map the file themselves).
+    """
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ContentStore()
+        return _default_store
+
+
+def fill_contents(docs):
+    """
+    Fetches text for docs whose content was left empty by the vector
+    store. Called only for the chunks that reach answer generation.
+    """
+    missing = [doc for doc in docs if doc.get("content") is None]
+    if not missing:
+        return docs
+
+    texts = default_store().get_many([doc["id"] for doc in missing])
+    for doc, text in zip(missing, texts):
+        if text is None:
+            logger.warning("No stored content for chunk %s", doc["id"])
+        doc["content"] = text or ""
+
+    logger.info("Fetched content for %d chunks", len(missing))
+    return docs
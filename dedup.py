@@ -0,0 +1,162 @@
+import zlib
+import hashlib
+import logging
+import numpy as np
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Constants
+# ------------------------------------------------------------------
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 8                 # 8 bands x 8 rows → LSH knee near 0.77
+SHINGLE_SIZE = 3              # word n-grams
+DEDUP_THRESHOLD = 0.85        # estimated Jaccard to count as duplicate
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+
+# ------------------------------------------------------------------
+# MinHash
+# ------------------------------------------------------------------
+def shingles(text, size=SHINGLE_SIZE):
+    words = text.lower().split()
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    def __init__(self, num_perm=NUM_PERMUTATIONS, seed=1):
+        rng = np.random.default_rng(seed)
+        # Keep a * h + b below 2**64 for 32-bit shingle hashes
+        self.a = rng.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles(text)),
+            dtype=np.uint64
+        )
+        if hashes.size == 0:
+            hashes = np.zeros(1, dtype=np.uint64)
+
+        permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME
+        return (permuted.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+# ------------------------------------------------------------------
+# Near-Duplicate Filter
+# ------------------------------------------------------------------
+class NearDuplicateFilter:
+    """
+    Streaming duplicate filter for chunks.
+
+    Exact copies are caught by a content hash. Near copies are found
+    through MinHash LSH banding, so each chunk is only compared with
+    the few candidates sharing a band bucket, which keeps the cost
+    flat as the corpus grows.
+    """
+
+    def __init__(
+        self,
+        threshold=DEDUP_THRESHOLD,
+        num_perm=NUM_PERMUTATIONS,
+        num_bands=NUM_BANDS
+    ):
+        if num_perm % num_bands:
+            raise ValueError("num_perm must be divisible by num_bands")
+
+        self.threshold = threshold
+        self.rows = num_perm // num_bands
+        self.num_bands = num_bands
+        self.hasher = MinHasher(num_perm)
+
+        self.exact_hashes = set()
+        self.buckets = [dict() for _ in range(num_bands)]
+        self.signatures = []
+
+        self.seen = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def is_duplicate(self, text):
+        """
+        Checks `text` against everything kept so far and records it
+        when it is new.
+        """
+        self.seen += 1
+
+        digest = hashlib.blake2b(
+            " ".join(text.lower().split()).encode("utf-8"), digest_size=16
+        ).digest()
+        if digest in self.exact_hashes:
+            self.exact_duplicates += 1
+            return True
+
+        signature = self.hasher.signature(text)
+        band_keys = [
+            signature[i * self.rows:(i + 1) * self.rows].tobytes()
+            for i in range(self.num_bands)
+        ]
+
+        candidates = set()
+        for bucket, key in zip(self.buckets, band_keys):
+            candidates.update(bucket.get(key, ()))
+
+        for idx in candidates:
+            if np.mean(self.signatures[idx] == signature) >= self.threshold:
+                self.near_duplicates += 1
+                return True
+
+        idx = len(self.signatures)
+        self.signatures.append(signature)
+        self.exact_hashes.add(digest)
+        for bucket, key in zip(self.buckets, band_keys):
+            bucket.setdefault(key, []).append(idx)
+
+        return False
+
+    def filter(self, chunks):
+        """
+        Yields only the chunks that are not duplicates.
+        """
+        for chunk in chunks:
+            if not self.is_duplicate(chunk["content"]):
+                yield chunk
+
+    def report(self):
+        removed = self.exact_duplicates + self.near_duplicates
+        return {
+            "seen": self.seen,
+            "kept": self.seen - removed,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "removed_pct": 100.0 * removed / self.seen if self.seen else 0.0,
+        }
+
+    def log_report(self):
+        stats = self.report()
+        logger.info(
+            "Dedup: seen=%d kept=%d exact=%d near=%d removed=%.1f%%",
+            stats["seen"],
+            stats["kept"],
+            stats["exact_duplicates"],
+            stats["near_duplicates"],
+            stats["removed_pct"]
+        )
+        return stats
@@ -0,0 +1,171 @@
+# embedding_bench.py
+
+import gc
+import json
+import time
+import logging
+import argparse
+import numpy as np
+
+from config import TOP_K
+from embedding_models import BACKENDS, load_embedding_model
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Corpus Sample
+# ------------------------------------------------------------------
+def load_sample_texts(sample_size, seed):
+    """
+    Samples chunk texts from rag_docs, falling back to the ingest
+    chunker when the collection is empty.
+    """
+    from chroma_store import all_collections
+
+    texts = [
+        text
+        for stored in all_collections()
+        for text in stored.get(include=["documents"])["documents"]
+        if text is not None     # None when stored with LAZY_CONTENT
+    ]
+
+    if not texts:
+        logger.warning("rag_docs is empty — chunking DOCS_PATH instead")
+        from ingest import iter_chunks
+        texts = [chunk["content"] for chunk in iter_chunks()]
+
+    rng = np.random.default_rng(seed)
+    if len(texts) > sample_size:
+        texts = [texts[i] for i in rng.choice(len(texts), sample_size, replace=False)]
+
+    logger.info("Benchmarking on %d chunks", len(texts))
+    return texts
+
+
+def _unit(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# ------------------------------------------------------------------
+# Benchmark
+# ------------------------------------------------------------------
+def bench_backend(backend, texts, batch_size, latency_queries):
+    load_start = time.perf_counter()
+    model = load_embedding_model(backend)
+    load_seconds = time.perf_counter() - load_start
+
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+
+    start = time.perf_counter()
+    embeddings = model.encode(texts, batch_size=batch_size)
+    throughput_seconds = time.perf_counter() - start
+
+    latencies = []
+    for text in texts[:latency_queries]:
+        query_start = time.perf_counter()
+        model.encode(text)
+        latencies.append(time.perf_counter() - query_start)
+    latencies_ms = np.asarray(latencies) * 1000.0
+
+    del model
+    gc.collect()
+
+    return np.asarray(embeddings, dtype=np.float32), {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "texts_per_second": len(texts) / throughput_seconds,
+        "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+        "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def agreement(reference, candidate, k):
+    """
+    Per-text cosine between backends, and how many of each text's
+    top-k neighbours (within the sample) both backends agree on.
+    """
+    reference = _unit(reference)
+    candidate = _unit(candidate)
+
+    cosines = np.sum(reference * candidate, axis=1)
+
+    k = min(k, len(reference) - 1)
+    ref_scores = reference @ reference.T
+    cand_scores = candidate @ candidate.T
+    np.fill_diagonal(ref_scores, -np.inf)
+    np.fill_diagonal(cand_scores, -np.inf)
+
+    ref_top = np.argpartition(-ref_scores, k - 1, axis=1)[:, :k]
+    cand_top = np.argpartition(-cand_scores, k - 1, axis=1)[:, :k]
+    overlap = np.mean([
+        len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)
+    ])
+
+    return {
+        "cosine_mean": float(cosines.mean()),
+        "cosine_min": float(cosines.min()),
+        f"neighbour_overlap_at_{k}": float(overlap),
+    }
+
+
+# ------------------------------------------------------------------
+# Main Execution
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare embedding backends against the fp32 model."
+    )
+    parser.add_argument("--backends", nargs="+", default=["fp32", "int8"],
+                        choices=BACKENDS)
+    parser.add_argument("--sample", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--latency-queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    texts = load_sample_texts(args.sample, args.seed)
+    backends = ["fp32"] + [b for b in args.backends if b != "fp32"]
+
+    reference = None
+    results = []
+    for backend in backends:
+        embeddings, stats = bench_backend(
+            backend, texts, args.batch_size, args.latency_queries
+        )
+
+        if reference is None:
+            reference = embeddings
+        else:
+            stats.update(agreement(reference, embeddings, TOP_K))
+
+        logger.info("%s", stats)
+        results.append(stats)
+
+    print(f"{'backend':>8} {'texts/s':>9} {'p50ms':>7} {'p95ms':>7} {'cos_mean':>9} {'cos_min':>8}")
+    for r in results:
+        print(
+            f"{r['backend']:>8} {r['texts_per_second']:>9.1f} "
+            f"{r['latency_p50_ms']:>7.2f} {r['latency_p95_ms']:>7.2f} "
+            f"{r.get('cosine_mean', 1.0):>9.4f} {r.get('cosine_min', 1.0):>8.4f}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
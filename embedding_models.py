@@ -0,0 +1,72 @@
+import os
+import logging
+from sentence_transformers import SentenceTransformer
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Settings
+# ------------------------------------------------------------------
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# fp32 | int8 (dynamic quantization of the Linear layers) | onnx
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "fp32")
+# The plain fp32 export by default; quantized, CPU-specific exports
+# (e.g. onnx/model_qint8_avx512.onnx) are opt-in
+ONNX_FILE_NAME = os.environ.get("EMBEDDING_ONNX_FILE", "onnx/model.onnx")
+
+BACKENDS = ("fp32", "int8", "onnx")
+
+
+# ------------------------------------------------------------------
+# Model Loading
+# ------------------------------------------------------------------
+def load_embedding_model(backend: str | None = None):
+    """
+    Loads all-MiniLM-L6-v2 with the requested backend. Every backend
+    returns a SentenceTransformer, so `encode` and `tokenizer` behave
+    the same everywhere.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    logger.info("Loading embedding model | backend=%s", backend)
+
+    if backend == "fp32":
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+    elif backend == "int8":
+        import torch
+
+        model = SentenceTransformer(EMBEDDING_MODEL_NAME, device="cpu")
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+
+    elif backend == "onnx":
+        # Needs sentence-transformers>=3.2 and `pip install optimum[onnxruntime]`
+        model = SentenceTransformer(
+            EMBEDDING_MODEL_NAME,
+            device="cpu",
+            backend="onnx",
+            model_kwargs={"file_name": ONNX_FILE_NAME},
+        )
+
+    else:
+        raise ValueError(
+            f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}"
+        )
+
+    logger.info("Embedding model loaded successfully | backend=%s", backend)
+    return model
@@ -1,10 +1,11 @@
 import logging
 import gradio as gr
-from chroma_store import search as chroma_search
+from chroma_store import search as chroma_search, embedding_model, index_version
 from main import run_rag_pipeline
 from embedding import embed_text
 from llm_client import llm
-from sentence_transformers import SentenceTransformer
+from topic_memory import TopicMemory
+from candidate_pool import CandidatePool
 
 # ------------------------------------------------------------------
 # Logging
@@ -24,59 +25,89 @@ if not logger.handlers:
 # ------------------------------------------------------------------
 # Models
 # ------------------------------------------------------------------
-logger.info("Loading SentenceTransformer model")
-model = SentenceTransformer("all-MiniLM-L6-v2")
-logger.info("SentenceTransformer model loaded successfully")
+# Reuse the model chroma_store already loaded instead of a second copy
+model = embedding_model
 
 # ------------------------------------------------------------------
 # Vector DB Adapter
 # ------------------------------------------------------------------
 class VectorDBAdapter:
-    def search(self, query: str, top_k=5):
+    def embed(self, query: str):
+        return embed_text(model.encode, query)
+
+    def search_embedding(self, query_embedding, top_k=5, include_embeddings=False, where=None):
+        return chroma_search(query_embedding, top_k, include_embeddings, where)
+
+    def search(self, query: str, top_k=5, where=None):
         logger.info("VectorDB search called | top_k=%d", top_k)
-        query_embedding = embed_text(model.encode, query)
-        return chroma_search(query_embedding, top_k)
+        return self.search_embedding(self.embed(query), top_k, where=where)
+
+    def index_version(self):
+        return index_version()
 
 vector_db = VectorDBAdapter()
 
 # ------------------------------------------------------------------
 # 🔥 SESSION STATE (ChatInterface-safe)
 # ------------------------------------------------------------------
-session_state = {
-    "conversation_summary": None,
-    "conversation_summary_embedding": None,
-    "current_topic_embedding": None,
-}
+def new_session_state(vector_db):
+    return {
+        "conversation_summary": None,
+        "conversation_summary_embedding": None,
+        "current_topic_embedding": None,
+        "topic_memory": TopicMemory(),
+        "candidate_pool": CandidatePool(vector_db),
+    }
+
+session_state = new_session_state(vector_db)
 
 # ------------------------------------------------------------------
 # Chat Handler (ChatInterface compliant)
 # ------------------------------------------------------------------
-def chat_fn(user_message: str, history):
-    logger.info("New chat message received")
+def source_filter(source_group: str | None):
+    """
+    Metadata filter restricting retrieval to one source group.
+    """
+    source_group = (source_group or "").strip()
+    return {"source_group": source_group} if source_group else None
 
+
+def run_turn(state: dict, user_message: str, vector_db, filters=None) -> dict:
+    """
+    Runs one turn against a session's state and updates it in place.
+    """
     result = run_rag_pipeline(
         user_query=user_message,
         llm=llm,
         embedder=model.encode,
         vector_db=vector_db,
-        conversation_summary=session_state["conversation_summary"],
-        conversation_summary_embedding=session_state["conversation_summary_embedding"],
-        current_topic_embedding=session_state["current_topic_embedding"],
+        conversation_summary=state["conversation_summary"],
+        conversation_summary_embedding=state["conversation_summary_embedding"],
+        current_topic_embedding=state["current_topic_embedding"],
+        topic_memory=state["topic_memory"],
+        candidate_pool=state["candidate_pool"],
+        filters=filters,
     )
 
     # -------------------------------
     # Update session memory
     # -------------------------------
-    session_state["conversation_summary"] = result["conversation_summary"]
-    session_state["conversation_summary_embedding"] = result["conversation_summary_embedding"]
-    session_state["current_topic_embedding"] = result["current_topic_embedding"]
+    state["conversation_summary"] = result["conversation_summary"]
+    state["conversation_summary_embedding"] = result["conversation_summary_embedding"]
+    state["current_topic_embedding"] = result["current_topic_embedding"]
+
+    return result
+
 
+def format_reply(result: dict) -> str:
     topic_relation = result["topic_relation"]
 
     # -------------------------------
     # UI topic indicator
     # -------------------------------
-    if topic_relation == "new_topic":
+    if result.get("topic_resumed"):
+        ui_prefix = "Returning to an earlier topic\n\n"
+    elif topic_relation == "new_topic":
         ui_prefix = "New topic \n\n"
     elif topic_relation == "same_topic":
         ui_prefix = "Continuing on the same topic\n\n"
@@ -87,21 +118,60 @@ def chat_fn(user_message: str, history):
 
     return ui_prefix + result["answer"]
 
+
+def chat_fn(user_message: str, history, source_group: str = ""):
+    logger.info("New chat message received")
+    return format_reply(
+        run_turn(session_state, user_message, vector_db, source_filter(source_group))
+    )
+
+def ingest_fn(file, source_group: str = ""):
+    """
+    Adds an uploaded file to the live index and waits until it is
+    searchable.
+    """
+    from live_index import live_indexer
+
+    path = getattr(file, "name", file)
+    version = live_indexer().submit_file(
+        path, (source_group or "").strip() or "default"
+    ).result()
+    return f"Indexed {path} (index version {version})"
+
 # ------------------------------------------------------------------
 # Gradio UI
 # ------------------------------------------------------------------
-demo = gr.ChatInterface(
-    fn=chat_fn,
-    title="RAG Chatbot (Topic-Aware)",
-    description="RAG chatbot with topic detection, confidence gating, and memory.",
-    examples=[
-        "What is a transformer model?",
-        "Explain self-attention",
-        "What is NLP?",
-        "What is tokenization?",
-        "What is SQL LEFT JOIN?",
-    ],
-)
+def build_demo(fn, ingest=None):
+    chat = gr.ChatInterface(
+        fn=fn,
+        title="RAG Chatbot (Topic-Aware)",
+        description="RAG chatbot with topic detection, confidence gating, and memory.",
+        examples=[
+            "What is a transformer model?",
+            "Explain self-attention",
+            "What is NLP?",
+            "What is tokenization?",
+            "What is SQL LEFT JOIN?",
+        ],
+        additional_inputs=[
+            gr.Textbox(label="Source group (optional)", placeholder="all sources"),
+        ],
+    )
+    if ingest is None:
+        return chat
+
+    add_documents = gr.Interface(
+        fn=ingest,
+        inputs=[
+            gr.File(label="PDF or text file", file_types=[".pdf", ".txt"]),
+            gr.Textbox(label="Source group", placeholder="default"),
+        ],
+        outputs=gr.Textbox(label="Result"),
+        api_name="ingest",
+    )
+    return gr.TabbedInterface([chat, add_documents], ["Chat", "Add documents"])
+
+demo = build_demo(chat_fn, ingest_fn)
 
 if __name__ == "__main__":
     demo.launch()
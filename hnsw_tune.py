@@ -0,0 +1,337 @@
+# hnsw_tune.py
+
+import os
+import json
+import time
+import shutil
+import logging
+import argparse
+import itertools
+import tempfile
+import numpy as np
+import chromadb
+
+from config import TOP_K
+from chroma_store import all_collections, embedding_model, hnsw_metadata
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+BUILD_BATCH_SIZE = 1000
+
+
+# ------------------------------------------------------------------
+# Data Loading
+# ------------------------------------------------------------------
+def load_corpus_embeddings():
+    """
+    Loads every embedding stored in rag_docs (all partitions and shards).
+    """
+    logger.info("Loading corpus embeddings from rag_docs")
+    embeddings = np.asarray([
+        row
+        for stored in all_collections()
+        for row in stored.get(include=["embeddings"])["embeddings"]
+    ], dtype=np.float32)
+    logger.info("Loaded %d corpus embeddings", len(embeddings))
+    return embeddings
+
+
+def load_query_embeddings(queries_path, corpus, sample_size, seed):
+    """
+    Embeds the queries in `queries_path` (one per line).
+    Falls back to sampling stored chunks when no query file is given.
+    """
+    rng = np.random.default_rng(seed)
+
+    if queries_path:
+        with open(queries_path, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+        if len(queries) > sample_size:
+            picked = rng.choice(len(queries), sample_size, replace=False)
+            queries = [queries[i] for i in picked]
+
+        logger.info("Embedding %d sample queries", len(queries))
+        return np.asarray(
+            embedding_model.encode(queries), dtype=np.float32
+        )
+
+    logger.warning("No query file given — sampling stored chunks as queries")
+    picked = rng.choice(len(corpus), min(sample_size, len(corpus)), replace=False)
+    return corpus[picked]
+
+
+# ------------------------------------------------------------------
+# Exact Search
+# ------------------------------------------------------------------
+def normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def exact_top_k(corpus, queries, k):
+    """
+    Brute-force cosine top-k, used as ground truth for recall.
+    """
+    scores = normalize(queries) @ normalize(corpus).T
+    k = min(k, corpus.shape[0])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row.tolist()) for row in top]
+
+
+# ------------------------------------------------------------------
+# Single Configuration Trial
+# ------------------------------------------------------------------
+HNSW_FILES = ("header.bin", "data_level0.bin", "length.bin", "link_lists.bin")
+
+
+def hnsw_file_size(path, skip=()):
+    """
+    Bytes in the HNSW segment files only (not chroma.sqlite3, which
+    also stores every vector), ignoring the top-level entries in
+    `skip`. Chroma writes these every hnsw:sync_threshold adds, so the
+    last rows may not be on disk yet.
+    """
+    total = 0
+    for entry in os.listdir(path):
+        if entry in skip:
+            continue
+        for root, _, files in os.walk(os.path.join(path, entry)):
+            for name in files:
+                if name in HNSW_FILES:
+                    total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def hnsw_index_bytes(count, dim, m):
+    """
+    hnswlib's in-memory size: every element stores its vector, label
+    and 2*M level-0 links; a fraction 1/(M-1) of upper-level lists of
+    M links each is expected on top.
+    """
+    level0 = dim * 4 + 8 + (2 * m) * 4 + 4
+    upper = (m * 4 + 4) / (m - 1)
+    return int(count * (level0 + upper))
+
+
+def run_trial(trial_client, tmp_dir, corpus, queries, truth, m, construction_ef,
+              search_ef, k):
+    """
+    Builds a throwaway index with the given HNSW parameters and measures
+    build time, index size (estimated from M, plus whatever HNSW files
+    Chroma has flushed), query latency and recall@k. The collection is
+    deleted afterwards; `trial_client` persists to `tmp_dir`.
+    """
+    existing = set(os.listdir(tmp_dir))
+
+    try:
+        trial_collection = trial_client.create_collection(
+            name="hnsw_tune",
+            metadata=hnsw_metadata(m, construction_ef, search_ef)
+        )
+
+        build_start = time.perf_counter()
+        for start_idx in range(0, len(corpus), BUILD_BATCH_SIZE):
+            block = corpus[start_idx:start_idx + BUILD_BATCH_SIZE]
+            trial_collection.add(
+                ids=[str(i) for i in range(start_idx, start_idx + len(block))],
+                embeddings=block.tolist(),
+            )
+        build_seconds = time.perf_counter() - build_start
+
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            query_start = time.perf_counter()
+            results = trial_collection.query(
+                query_embeddings=[query.tolist()],
+                n_results=len(expected),
+                include=[]
+            )
+            latencies.append(time.perf_counter() - query_start)
+            hits += len(expected & {int(i) for i in results["ids"][0]})
+
+        latencies_ms = np.asarray(latencies) * 1000.0
+
+        return {
+            "corpus_size": len(corpus),
+            "M": m,
+            "construction_ef": construction_ef,
+            "search_ef": search_ef,
+            "recall_at_k": hits / max(1, sum(len(t) for t in truth)),
+            "k": k,
+            "build_seconds": build_seconds,
+            "index_bytes": hnsw_index_bytes(len(corpus), corpus.shape[1], m),
+            "hnsw_file_bytes": hnsw_file_size(tmp_dir, skip=existing),
+            "latency_p50_ms": float(np.percentile(latencies_ms, 50)),
+            "latency_p95_ms": float(np.percentile(latencies_ms, 95)),
+            "latency_mean_ms": float(latencies_ms.mean()),
+        }
+
+    finally:
+        try:
+            trial_client.delete_collection("hnsw_tune")
+        except ValueError:      # create_collection failed
+            pass
+
+
+# ------------------------------------------------------------------
+# Sweep
+# ------------------------------------------------------------------
+def tune(corpus, queries, *, corpus_sizes, m_values, construction_efs,
+         search_efs, k=TOP_K, seed=0):
+    """
+    Runs every parameter combination for every corpus size.
+    """
+    rng = np.random.default_rng(seed)
+    trials = []
+
+    # One client for the whole sweep: chromadb caches a System per path
+    # for the life of the process, so a client per trial would keep
+    # every trial's index (and its open files) alive
+    tmp_dir = tempfile.mkdtemp(prefix="hnsw_tune_")
+    trial_client = chromadb.PersistentClient(path=tmp_dir)
+
+    try:
+        for size in corpus_sizes:
+            size = min(size, len(corpus))
+            subset = corpus[rng.choice(len(corpus), size, replace=False)]
+            truth = exact_top_k(subset, queries, k)
+
+            for m, construction_ef, search_ef in itertools.product(
+                m_values, construction_efs, search_efs
+            ):
+                logger.info(
+                    "Trial | corpus=%d M=%d construction_ef=%d search_ef=%d",
+                    size, m, construction_ef, search_ef
+                )
+                trial = run_trial(
+                    trial_client, tmp_dir, subset, queries, truth,
+                    m, construction_ef, search_ef, k
+                )
+                logger.info(
+                    "recall@%d=%.4f p95=%.2fms build=%.2fs size=%.1fMB",
+                    k,
+                    trial["recall_at_k"],
+                    trial["latency_p95_ms"],
+                    trial["build_seconds"],
+                    trial["index_bytes"] / 1e6
+                )
+                trials.append(trial)
+
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if os.path.exists(tmp_dir):
+            logger.warning("Could not remove %s (files still open)", tmp_dir)
+
+    return trials
+
+
+def recommend(trials, min_recall):
+    """
+    Picks, per corpus size, the fastest (p95) configuration that meets
+    `min_recall`. Falls back to the highest-recall one otherwise.
+    """
+    best = {}
+    for size in sorted({t["corpus_size"] for t in trials}):
+        candidates = [t for t in trials if t["corpus_size"] == size]
+        passing = [t for t in candidates if t["recall_at_k"] >= min_recall]
+
+        if passing:
+            best[size] = min(passing, key=lambda t: t["latency_p95_ms"])
+        else:
+            best[size] = max(candidates, key=lambda t: t["recall_at_k"])
+
+    return best
+
+
+def print_report(trials, best):
+    header = (
+        f"{'corpus':>8} {'M':>4} {'c_ef':>5} {'s_ef':>5} {'recall':>7} "
+        f"{'p50ms':>7} {'p95ms':>7} {'build_s':>8} {'size_MB':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for t in trials:
+        print(
+            f"{t['corpus_size']:>8} {t['M']:>4} {t['construction_ef']:>5} "
+            f"{t['search_ef']:>5} {t['recall_at_k']:>7.4f} "
+            f"{t['latency_p50_ms']:>7.2f} {t['latency_p95_ms']:>7.2f} "
+            f"{t['build_seconds']:>8.2f} {t['index_bytes'] / 1e6:>8.1f}"
+        )
+
+    print()
+    for size, t in best.items():
+        print(
+            f"Recommended for {size} chunks: M={t['M']} "
+            f"construction_ef={t['construction_ef']} "
+            f"search_ef={t['search_ef']} "
+            f"(recall={t['recall_at_k']:.4f}, p95={t['latency_p95_ms']:.2f}ms)"
+        )
+
+
+# ------------------------------------------------------------------
+# Main Execution
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Sweep HNSW parameters for the rag_docs collection."
+    )
+    parser.add_argument("--queries", help="Text file with one query per line")
+    parser.add_argument("--sample", type=int, default=200)
+    parser.add_argument("--corpus-sizes", type=int, nargs="+")
+    parser.add_argument("--m", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument(
+        "--construction-ef", type=int, nargs="+", default=[64, 100, 200]
+    )
+    parser.add_argument(
+        "--search-ef", type=int, nargs="+", default=[10, 50, 100]
+    )
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write all trials as JSON")
+    args = parser.parse_args()
+
+    corpus = load_corpus_embeddings()
+    if len(corpus) == 0:
+        raise SystemExit("rag_docs is empty — run ingest.py first")
+
+    queries = load_query_embeddings(args.queries, corpus, args.sample, args.seed)
+
+    trials = tune(
+        corpus,
+        queries,
+        corpus_sizes=args.corpus_sizes or [len(corpus)],
+        m_values=args.m,
+        construction_efs=args.construction_ef,
+        search_efs=args.search_ef,
+        seed=args.seed,
+    )
+
+    best = recommend(trials, args.min_recall)
+    print_report(trials, best)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"trials": trials, "recommended": list(best.values())},
+                f,
+                indent=2
+            )
+        logger.info("Wrote %d trials to %s", len(trials), args.output)
@@ -3,10 +3,17 @@
 import os
 import logging
 from pypdf import PdfReader
-from sentence_transformers import SentenceTransformer
 
-from embedding import embed_text
-from chroma_store import add_documents
+from chunk_batch import ChunkBatch
+from config import INGEST_VERSION
+from chunker import chunk_pages, make_token_counter
+from dedup import NearDuplicateFilter
+from chroma_store import (
+    add_documents_pipelined,
+    embedding_model,
+    prune_legacy_rows,
+    prune_source,
+)
 
 # ------------------------------------------------------------------
 # Logging Configuration
@@ -29,94 +36,124 @@ if not logger.handlers:
 # Constants & Model Initialization
 # ------------------------------------------------------------------
 DOCS_PATH = "data/"
+DEFAULT_SOURCE_GROUP = "default"
+
+# Shares the model chroma_store loaded (EMBEDDING_BACKEND selects it)
+model = embedding_model
+
+count_tokens = make_token_counter(model)
 
-try:
-    logger.info("Loading SentenceTransformer model for ingestion")
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    logger.info("SentenceTransformer model loaded successfully")
-except Exception:
-    logger.exception("Failed to load SentenceTransformer model")
-    raise
 # ------------------------------------------------------------------
-# Chunking Function
+# Page Reader
 # ------------------------------------------------------------------
-def chunk_text(text, chunk_size=400, overlap=80):
-    chunks = []
-    start = 0
-    text_length = len(text)
+def iter_pages(path):
+    """
+    Yields (page_number, text) pairs one page at a time.
+    Text files are treated as a single page.
+    """
+    if path.endswith(".pdf"):
+        reader = PdfReader(path)
+        for page_number, page in enumerate(reader.pages, start=1):
+            yield page_number, page.extract_text() or ""
 
-    while start < text_length:
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start += chunk_size - overlap
+    elif path.endswith(".txt"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield 1, f.read()
 
-    return chunks
 
 # ------------------------------------------------------------------
-# Document Loader
+# Chunk Iterator
 # ------------------------------------------------------------------
-def load_documents():
+def chunk_id(source, index):
+    """
+    Stable id of a file's index-th chunk: the same file always maps to
+    the same ids, whatever else is in DOCS_PATH.
+    """
+    return f"{source}#{index}"
+
+
+def list_source_files():
+    """
+    Returns (relative_path, source_group) for every file under
+    DOCS_PATH, in a stable order. Files in a sub-directory belong to
+    the group named after it; top-level files to DEFAULT_SOURCE_GROUP.
+    """
+    files = []
+    for root, dirs, names in os.walk(DOCS_PATH):
+        dirs.sort()
+        for name in sorted(names):
+            rel_path = os.path.relpath(os.path.join(root, name), DOCS_PATH)
+            parts = rel_path.split(os.sep)
+            group = parts[0] if len(parts) > 1 else DEFAULT_SOURCE_GROUP
+            files.append((rel_path, group))
+    return files
+
+
+def iter_chunks():
+    """
+    Yields {id, content, metadata} dicts for every chunk in DOCS_PATH,
+    without embedding them. Metadata records the source file, source
+    group, page range, document type and ingest version.
+    """
     logger.info("Starting document ingestion from path: %s", DOCS_PATH)
 
-    documents = []
-    doc_id = 0
-
     try:
-        files = os.listdir(DOCS_PATH)
+        files = list_source_files()
         logger.info("Found %d files in data directory", len(files))
     except Exception:
         logger.exception("Failed to list files in data directory")
         raise
 
-    for file in files:
+    for file, source_group in files:
         path = os.path.join(DOCS_PATH, file)
-        logger.info("Processing file: %s", file)
-
-        try:
-            if file.endswith(".pdf"):
-                reader = PdfReader(path)
-                text = "\n".join(
-                    page.extract_text() or "" for page in reader.pages
-                )
-                logger.debug("Extracted text from PDF: %s", file)
-
-            elif file.endswith(".txt"):
-                with open(path, "r", encoding="utf-8") as f:
-                    text = f.read()
-                logger.debug("Read text file: %s", file)
-
-            else:
-                logger.warning("Skipping unsupported file type: %s", file)
-                continue
-
-            chunks = chunk_text(text)
-
-            logger.info(
-                "File '%s' split into %d chunks before filtering",
-                file, len(chunks)
-            )
-
-            for chunk in chunks:
-                chunk = chunk.strip()
 
-                if len(chunk) < 150:
-                    continue
-
-                embedding = embed_text(model.encode, chunk)
+        if not file.endswith((".pdf", ".txt")):
+            logger.warning("Skipping unsupported file type: %s", file)
+            continue
 
-                documents.append({
-                    "id": f"doc_{doc_id}",
-                    "content": chunk,
-                    "embedding": embedding
-                })
+        logger.info("Processing file: %s", file)
+        source = file.replace(os.sep, "/")
+        file_chunks = 0
 
-                doc_id += 1
+        try:
+            for chunk in chunk_pages(iter_pages(path), count_tokens):
+                chunk["id"] = chunk_id(source, file_chunks)
+                chunk["metadata"] = {
+                    "source": source,
+                    "source_group": source_group,
+                    "chunk_index": file_chunks,
+                    "page_start": chunk["page_start"],
+                    "page_end": chunk["page_end"],
+                    "doc_type": file.rsplit(".", 1)[-1].lower(),
+                    "ingest_version": INGEST_VERSION,
+                }
+                yield chunk
+
+                file_chunks += 1
 
         except Exception:
             logger.exception("Failed to process file: %s", file)
             continue
 
+        logger.info("File '%s' split into %d chunks", file, file_chunks)
+
+
+# ------------------------------------------------------------------
+# Document Loader
+# ------------------------------------------------------------------
+def load_documents(batch_size=128):
+    """
+    Loads, deduplicates and embeds every chunk into one ChunkBatch.
+    """
+    dedup = NearDuplicateFilter()
+
+    batches = [
+        batch.with_embeddings(model.encode(batch.contents, batch_size=batch_size))
+        for batch in ChunkBatch.iter_batches(dedup.filter(iter_chunks()), batch_size)
+    ]
+    documents = ChunkBatch.concat(batches)
+
+    dedup.log_report()
     logger.info("Total chunks prepared for ingestion: %d", len(documents))
     return documents
 
@@ -128,12 +165,30 @@ if __name__ == "__main__":
     logger.info("Ingestion script started")
 
     try:
-        docs = load_documents()
-        add_documents(docs)
+        dedup = NearDuplicateFilter()
+        written = {}
+
+        def track(chunks):
+            for chunk in chunks:
+                written.setdefault(chunk["metadata"]["source"], set()).add(chunk["id"])
+                yield chunk
+
+        count = add_documents_pipelined(
+            track(dedup.filter(iter_chunks())),
+            model.encode
+        )
+        dedup.log_report()
+
+        # Rows of re-ingested files that this run did not rewrite
+        # (tail chunks of a shorter file, newly dropped duplicates)
+        stale = sum(prune_source(source, ids) for source, ids in written.items())
+        # Rows of the old doc_<n> scheme carry no source to match on
+        stale += prune_legacy_rows()
+        logger.info("Removed %d stale chunks", stale)
 
         logger.info(
             "Successfully ingested %d chunks into ChromaDB",
-            len(docs)
+            count
         )
 
     except Exception:
@@ -0,0 +1,175 @@
+# live_index.py
+
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+
+import chroma_store
+from chunk_batch import ChunkBatch
+from chunker import chunk_pages
+from config import INGEST_VERSION, LIVE_INGEST_BATCH_SIZE
+from ingest import DEFAULT_SOURCE_GROUP, chunk_id, count_tokens, iter_pages
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Live Indexer
+# ------------------------------------------------------------------
+class LiveIndexer:
+    """
+    Applies new chunks to the running index from a background thread.
+
+    Each submitted update becomes one index version: its chunks are
+    embedded and upserted in batches, hidden from searches, and made
+    visible together when the version is published. Updates are applied
+    one at a time, in submission order.
+
+    An update may replace whole sources: its chunks are then written
+    under new, version-suffixed ids, so the old rows keep serving until
+    the publish hides them (and they are deleted afterwards).
+    """
+
+    def __init__(self, embed_fn=None, batch_size=LIVE_INGEST_BATCH_SIZE):
+        self.embed_fn = embed_fn or chroma_store.embedding_model.encode
+        self.batch_size = batch_size
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.applied = 0
+
+    def _ensure_started(self):
+        # Started on first use, so forking servers can create one early
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self._run, name="live-indexer", daemon=True
+                )
+                self.thread.start()
+
+    # --------------------------------------------------------------
+    # Submission
+    # --------------------------------------------------------------
+    def submit_chunks(self, chunks, replaces=()) -> Future:
+        """
+        Queues {id, content[, metadata]} dicts as one update; `replaces`
+        lists sources whose existing rows it supersedes. Without it, ids
+        should be new (an upserted existing id is hidden until publish).
+        The future resolves to the published version.
+        """
+        future = Future()
+        self.jobs.put((list(chunks), tuple(replaces), future))
+        self._ensure_started()
+        return future
+
+    def submit_file(self, path, source_group=DEFAULT_SOURCE_GROUP) -> Future:
+        """
+        Chunks one .pdf or .txt file and queues it as one update that
+        replaces any earlier version of the file. Ids and metadata
+        follow ingest.py, as if the file sat in DOCS_PATH/<source_group>/
+        (plus a version suffix).
+        """
+        name = os.path.basename(path)
+        source = name if source_group == DEFAULT_SOURCE_GROUP else f"{source_group}/{name}"
+
+        chunks = []
+        for n, chunk in enumerate(chunk_pages(iter_pages(path), count_tokens)):
+            chunk["id"] = chunk_id(source, n)
+            chunk["metadata"] = {
+                "source": source,
+                "source_group": source_group,
+                "chunk_index": n,
+                "page_start": chunk["page_start"],
+                "page_end": chunk["page_end"],
+                "doc_type": name.rsplit(".", 1)[-1].lower(),
+                "ingest_version": INGEST_VERSION,
+            }
+            chunks.append(chunk)
+
+        logger.info("Queued %s (%d chunks) for live indexing", path, len(chunks))
+        return self.submit_chunks(chunks, replaces=[source])
+
+    def pending(self):
+        return self.jobs.qsize()
+
+    # --------------------------------------------------------------
+    # Background Apply
+    # --------------------------------------------------------------
+    def _apply(self, chunks, replaces):
+        version = chroma_store.begin_version()
+        try:
+            for batch in ChunkBatch.iter_batches(chunks, self.batch_size):
+                metadatas = batch.metadatas or [{} for _ in range(len(batch))]
+                batch = ChunkBatch(
+                    [f"{chunk_id}@{version}" for chunk_id in batch.ids]
+                    if replaces else batch.ids,
+                    batch.contents,
+                    self.embed_fn(batch.contents, batch_size=self.batch_size),
+                    metadatas=[
+                        {**(m or {}), chroma_store.VERSION_KEY: version}
+                        for m in metadatas
+                    ],
+                )
+                chroma_store.add_pending_rows(len(batch))
+                chroma_store.write_batch(batch)
+
+        except Exception:
+            chroma_store.abandon_version(version)
+            raise
+
+        chroma_store.publish_version(version, replaces)
+        return version
+
+    def _run(self):
+        try:
+            chroma_store.retry_replaced()
+        except Exception:
+            logger.exception("Cleanup of replaced rows failed")
+
+        while True:
+            chunks, replaces, future = self.jobs.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                version = self._apply(chunks, replaces)
+                self.applied += len(chunks)
+                future.set_result(version)
+                logger.info(
+                    "Live update of %d chunks published as version %d",
+                    len(chunks),
+                    version
+                )
+            except Exception as e:
+                logger.exception("Live update failed")
+                future.set_exception(e)
+
+
+_indexer = None
+_indexer_lock = threading.Lock()
+
+
+def live_indexer():
+    """
+    The process-wide indexer (one writer per process).
+    """
+    global _indexer
+    with _indexer_lock:
+        if _indexer is None:
+            _indexer = LiveIndexer()
+        return _indexer
@@ -1,3 +1,4 @@
+import json
 import logging
 
 # ------------------------------------------------------------------
@@ -39,8 +40,13 @@ def generate_answer(
 
     context = "\n\n".join(doc["content"] for doc in retrieved_docs)
 
+    response = llm(_answer_prompt(user_query, context, is_first_turn)).strip()
+    return response
+
+
+def _answer_prompt(user_query: str, context: str, is_first_turn: bool) -> str:
     if is_first_turn:
-        prompt = f"""
+        return f"""
         You are a helpful AI assistant.
 
         Use the context below to answer the question.
@@ -52,8 +58,8 @@ def generate_answer(
         Question:
         {user_query}
         """
-    else:
-        prompt = f"""
+
+    return f"""
         Answer the question using ONLY the context below.
 
         Rules:
@@ -67,6 +73,76 @@ def generate_answer(
         {user_query}
         """
 
-    response = llm(prompt).strip()
-    return response
 
+# ------------------------------------------------------------------
+# Fused Answer + Summary
+# ------------------------------------------------------------------
+def generate_answer_with_summary(
+    llm,
+    user_query: str,
+    retrieved_docs: list[dict],
+    previous_summary: str | None,
+    *,
+    is_first_turn: bool = False
+) -> tuple[str | None, str | None]:
+    """
+    Generates the answer and the updated conversation summary in one
+    LLM call. Returns (answer, summary). When the reply has no usable
+    answer (not JSON, e.g. truncated) both are None and the caller
+    should fall back to generate_answer; when only the summary is
+    missing, it should fall back to update_summary.
+    """
+    logger.info("generate_answer_with_summary called")
+    logger.info("Number of retrieved documents: %d", len(retrieved_docs))
+
+    if not retrieved_docs:
+        logger.warning("No retrieved documents provided to LLM")
+        return "I don't know", None
+
+    context = "\n\n".join(doc["content"] for doc in retrieved_docs)
+
+    # The summary comes after the answer rules, fenced off, so the
+    # answer stays grounded in the retrieved context only
+    prompt = _answer_prompt(user_query, context, is_first_turn) + f"""
+        ==== Summary task (separate from the answer) ====
+        Do NOT use the summary below to write the answer; it is not
+        context. After answering, update it with this question and your
+        answer.
+
+        Existing Summary:
+        {previous_summary or ""}
+        ==== End of summary task ====
+
+        Reply with a single JSON object and nothing else:
+        {{"answer": "<answer>", "summary": "<updated summary>"}}
+        """
+
+    response = llm(prompt).strip()
+    answer, summary = _parse_fused(response)
+
+    if answer is None:
+        logger.warning("Fused reply had no parsable answer — falling back to separate calls")
+    elif summary is None:
+        logger.warning("Fused reply had no summary — summary falls back to a separate call")
+    return answer, summary
+
+
+def _parse_fused(response: str) -> tuple[str | None, str | None]:
+    text = response
+    if text.startswith("```"):
+        # ```json ... ``` fences
+        text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+
+    try:
+        parsed = json.loads(text[text.index("{"):text.rindex("}") + 1])
+    except ValueError:
+        return None, None
+
+    answer = parsed.get("answer") if isinstance(parsed, dict) else None
+    summary = parsed.get("summary") if isinstance(parsed, dict) else None
+
+    if not isinstance(answer, str) or not answer.strip():
+        return None, None
+    if not isinstance(summary, str) or not summary.strip():
+        return answer.strip(), None
+    return answer.strip(), summary.strip()
@@ -0,0 +1,320 @@
+# loadtest.py
+
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import importlib
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+DEFAULT_SCRIPT = [
+    "What is a transformer model?",
+    "Explain self-attention",
+    "How does it differ from an RNN?",
+    "What is SQL LEFT JOIN?",
+    "Back to transformers: what is positional encoding?",
+]
+
+FILLER_WORDS = (
+    "the model retrieves relevant context and answers using only the "
+    "provided documents while keeping the conversation summary short"
+).split()
+
+
+# ------------------------------------------------------------------
+# Fake OpenAI-Compatible Server
+# ------------------------------------------------------------------
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """
+    Answers POST /v1/chat/completions after a simulated delay of
+    latency + completion_tokens / tokens_per_second (with jitter).
+    A fraction of requests can fail with 429/500 to exercise retries.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        settings = self.server.settings
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        if random.random() < settings["error_rate"]:
+            status = random.choice((429, 500))
+            self._send(status, {"error": {"message": "Simulated failure", "type": "fake"}})
+            return
+
+        prompt = " ".join(
+            str(message.get("content", "")) for message in body.get("messages", [])
+        )
+        prompt_tokens = len(prompt) // 4
+        completion_tokens = settings["completion_tokens"]
+
+        delay = settings["latency"] + completion_tokens / settings["tokens_per_second"]
+        time.sleep(delay * random.uniform(1 - settings["jitter"], 1 + settings["jitter"]))
+
+        content = " ".join(
+            FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(completion_tokens)
+        )
+        if '"summary"' in prompt:
+            # Fused answer + summary prompt (FUSED_ANSWER_SUMMARY)
+            content = json.dumps({"answer": content, "summary": content})
+        self._send(200, {
+            "id": f"chatcmpl-fake-{random.getrandbits(32):08x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        })
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("fake-llm " + format, *args)
+
+
+def start_fake_llm(latency=0.3, tokens_per_second=50.0, completion_tokens=64,
+                   jitter=0.2, error_rate=0.0, port=0):
+    """
+    Starts the fake server on a background thread and returns it.
+    Its base URL is server.base_url.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.settings = {
+        "latency": latency,
+        "tokens_per_second": tokens_per_second,
+        "completion_tokens": completion_tokens,
+        "jitter": jitter,
+        "error_rate": error_rate,
+    }
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    threading.Thread(
+        target=server.serve_forever, name="fake-llm", daemon=True
+    ).start()
+    logger.info("Fake LLM listening on %s | settings=%s", server.base_url, server.settings)
+    return server
+
+
+# ------------------------------------------------------------------
+# Memory
+# ------------------------------------------------------------------
+def rss_mb():
+    """
+    Current resident set size in MB: psutil when installed, else /proc,
+    else peak RSS from `resource` (Unix only). NaN when none apply.
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024.0 * 1024.0)
+    except ImportError:
+        pass
+
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:     # Windows without psutil
+        return float("nan")
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+# ------------------------------------------------------------------
+# Simulated Users
+# ------------------------------------------------------------------
+def simulate_user(user_idx, script, turns, think_time, use_chat_fn):
+    """
+    Runs one user's conversation and returns per-turn
+    (latency_seconds, error or None) pairs.
+    """
+    import gradio_app
+
+    state = gradio_app.new_session_state(gradio_app.vector_db)
+    rng = random.Random(user_idx)
+    samples = []
+
+    for turn in range(turns):
+        message = script[turn % len(script)]
+        started = time.perf_counter()
+        try:
+            if use_chat_fn:
+                gradio_app.chat_fn(message, [])
+            else:
+                gradio_app.run_turn(state, message, gradio_app.vector_db)
+            samples.append((time.perf_counter() - started, None))
+        except Exception as e:
+            samples.append((time.perf_counter() - started, type(e).__name__))
+
+        if think_time:
+            time.sleep(rng.uniform(0, 2 * think_time))
+
+    return samples
+
+
+def run_level(users, script, turns, think_time, use_chat_fn):
+    """
+    Runs `users` concurrent conversations and summarises the turns.
+    """
+    from llm_client import usage_stats
+    from chroma_store import shard_stats
+
+    rss_before = rss_mb()
+    usage_before = usage_stats()
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=users, thread_name_prefix="user") as pool:
+        per_user = list(pool.map(
+            lambda idx: simulate_user(idx, script, turns, think_time, use_chat_fn),
+            range(users)
+        ))
+
+    elapsed = time.perf_counter() - started
+    usage_after = usage_stats()
+
+    samples = [sample for user in per_user for sample in user]
+    latencies = np.asarray([latency for latency, _ in samples]) * 1000.0
+    errors = {}
+    for _, error in samples:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+
+    return {
+        "users": users,
+        "turns": len(samples),
+        "seconds": elapsed,
+        "turns_per_second": len(samples) / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+        "error_rate": sum(errors.values()) / len(samples),
+        "errors": errors,
+        "llm_calls": usage_after["calls"] - usage_before["calls"],
+        "llm_retries": usage_after["retries"] - usage_before["retries"],
+        "rss_mb": rss_mb(),
+        "rss_growth_mb": rss_mb() - rss_before,
+        "shards": shard_stats(),
+    }
+
+
+def load_script(path):
+    """
+    Turns of the first conversation in a batch_eval-style JSONL file.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                return [
+                    turn["query"] if isinstance(turn, dict) else turn
+                    for turn in record["turns"]
+                ]
+    raise ValueError(f"No conversations in {path}")
+
+
+# ------------------------------------------------------------------
+# Main Execution
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load-test the chat pipeline with concurrent simulated users."
+    )
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--turns", type=int, default=5, help="Turns per user")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean pause between a user's turns (seconds)")
+    parser.add_argument("--script", help="JSONL conversation file (first one is used)")
+    parser.add_argument("--chat-fn", action="store_true",
+                        help="Go through gradio_app.chat_fn (one shared session) "
+                             "instead of a session per user")
+    parser.add_argument("--real-llm", action="store_true",
+                        help="Use the configured LLM instead of the fake server")
+    parser.add_argument("--fake-latency", type=float, default=0.3)
+    parser.add_argument("--fake-tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--fake-completion-tokens", type=int, default=64)
+    parser.add_argument("--fake-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="Write results as JSON")
+    args = parser.parse_args()
+
+    if not args.real_llm:
+        # Must happen before llm_client is imported (it reads the env once)
+        fake = start_fake_llm(
+            latency=args.fake_latency,
+            tokens_per_second=args.fake_tokens_per_second,
+            completion_tokens=args.fake_completion_tokens,
+            error_rate=args.fake_error_rate,
+        )
+        os.environ["OPENAI_BASE_URL"] = fake.base_url
+
+    # Loads the model and store once, up front (simulate_user imports it too)
+    importlib.import_module("gradio_app")
+
+    script = load_script(args.script) if args.script else DEFAULT_SCRIPT
+    results = []
+    for users in args.users:
+        logger.info("Running %d concurrent users x %d turns", users, args.turns)
+        stats = run_level(users, script, args.turns, args.think_time, args.chat_fn)
+        logger.info("%s", stats)
+        results.append(stats)
+
+    print(f"{'users':>6} {'turns/s':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} "
+          f"{'errors':>7} {'rss_mb':>8} {'+rss_mb':>8}")
+    for r in results:
+        print(
+            f"{r['users']:>6} {r['turns_per_second']:>8.2f} {r['p50_ms']:>8.0f} "
+            f"{r['p95_ms']:>8.0f} {r['p99_ms']:>8.0f} {r['error_rate']:>7.1%} "
+            f"{r['rss_mb']:>8.0f} {r['rss_growth_mb']:>8.1f}"
+        )
+
+    from chroma_store import log_shard_stats
+    log_shard_stats()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
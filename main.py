@@ -1,13 +1,17 @@
+import time
 import logging
 import numpy as np
 
 from embedding import embed_text
-from similarity import detect_topic_relation
+from config import PROMOTE_PARTIAL_THRESHOLD, FUSED_ANSWER_SUMMARY
+from similarity import detect_topic_relation, match_topic
 from query_rewrite import rewrite_query
 from retriever import retrieve_documents
-from confidence import is_confident
-from llm_answer import generate_answer
+from confidence import is_confident, is_hopeless
+from llm_answer import generate_answer, generate_answer_with_summary
+from content_store import fill_contents
 from memory import update_summary
+from profiling import maybe_profile
 
 # ------------------------------------------------------------------
 # Logging Configuration
@@ -25,10 +29,44 @@ if not logger.handlers:
     logger.addHandler(handler)
 
 
+FALLBACK_ANSWER = "I don’t have enough relevant information to answer this confidently."
+
+
+# ------------------------------------------------------------------
+# Stage Timer
+# ------------------------------------------------------------------
+class StageTimer:
+    """
+    Records wall time per pipeline stage, in seconds.
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self._start = self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+    def finish(self) -> dict:
+        self.timings["total"] = time.perf_counter() - self._start
+        return self.timings
+
+
 # ------------------------------------------------------------------
 # RAG Pipeline
 # ------------------------------------------------------------------
-def run_rag_pipeline(
+def run_rag_pipeline(user_query: str, *, profile: bool = False, **kwargs):
+    """
+    Runs one chat turn. Set `profile=True` (or RAG_PROFILE /
+    RAG_PROFILE_SAMPLE) to capture a CPU and allocation profile of it.
+    """
+    with maybe_profile(profile):
+        return _run_rag_pipeline(user_query, **kwargs)
+
+
+def _run_rag_pipeline(
     user_query: str,
     *,
     llm,
@@ -36,9 +74,14 @@ def run_rag_pipeline(
     vector_db,
     conversation_summary: str | None,
     conversation_summary_embedding: list[float] | None,
-    current_topic_embedding: list[float] | None,   
+    current_topic_embedding: list[float] | None,
+    topic_memory=None,
+    candidate_pool=None,
+    filters: dict | None = None,
+    fused_summary: bool = FUSED_ANSWER_SUMMARY,
 ):
     logger.info("RAG pipeline started")
+    timer = StageTimer()
 
     try:
         # --------------------------------------------------------------
@@ -46,13 +89,27 @@ def run_rag_pipeline(
         # --------------------------------------------------------------
         logger.info("Step 1: Embedding user query")
         query_embedding = embed_text(embedder, user_query)
+        timer.lap("embed")
 
         # --------------------------------------------------------------
         # Step 2: Topic similarity detection (FIXED)
         # --------------------------------------------------------------
         logger.info("Step 2: Topic similarity detection")
 
-        if current_topic_embedding is None:
+        if topic_memory is not None and len(topic_memory):
+            topic_info = match_topic(query_embedding, topic_memory)
+
+            # Returning to an earlier topic → restore its memory
+            if topic_info["resumed"]:
+                topic_memory.activate(topic_info["topic_index"])
+                conversation_summary, conversation_summary_embedding = (
+                    topic_memory.summary(topic_info["topic_index"])
+                )
+                current_topic_embedding = topic_memory.centroid(
+                    topic_info["topic_index"]
+                )
+
+        elif current_topic_embedding is None:
             topic_info = {"relation": "new_topic", "similarity": 0.0}
             logger.info("No current topic → new topic")
         else:
@@ -61,18 +118,78 @@ def run_rag_pipeline(
                 current_topic_embedding
             )
 
-            # 🔥 Promote strong partial → same_topic
+        # 🔥 Promote strong partial → same_topic
+        if (
+            topic_info["relation"] == "partial"
+            and topic_info.get("similarity", 0.0) >= PROMOTE_PARTIAL_THRESHOLD
+        ):
+            topic_info["relation"] = "same_topic"
+
+        logger.info(
+            "Topic relation: %s | Similarity: %.4f",
+            topic_info["relation"],
+            topic_info.get("similarity", 0.0)
+        )
+
+        timer.lap("topic")
+
+        is_first_turn = conversation_summary is None or conversation_summary.strip() == ""
+
+        # --------------------------------------------------------------
+        # Step 2b: Pre-LLM confidence check
+        # --------------------------------------------------------------
+        # Only turns that would pay for a rewrite and could be rejected
+        if not is_first_turn and topic_info["relation"] != "new_topic":
+            logger.info("Step 2b: Pre-LLM confidence check")
+
+            probes = [query_embedding]
             if (
-                topic_info["relation"] == "partial"
-                and topic_info.get("similarity", 0.0) >= 0.65
+                topic_info["relation"] == "same_topic"
+                and conversation_summary_embedding is not None
             ):
-                topic_info["relation"] = "same_topic"
+                probes.append(conversation_summary_embedding)
 
-            logger.info(
-                "Topic relation: %s | Similarity: %.4f",
-                topic_info["relation"],
-                topic_info.get("similarity", 0.0)
-            )
+            # A warm same-topic pool answers without touching Chroma;
+            # its scores are lower bounds, so only a miss goes further
+            best_case_scores = []
+            if (
+                candidate_pool is not None
+                and topic_info["relation"] == "same_topic"
+                and not topic_info.get("resumed")
+            ):
+                best_case_scores = [
+                    score
+                    for score in (
+                        candidate_pool.best_score(probe, where=filters)
+                        for probe in probes
+                    )
+                    if score is not None
+                ]
+
+            if not best_case_scores or is_hopeless(best_case_scores):
+                best_case_scores = [
+                    doc["score"]
+                    for probe in probes
+                    for doc in vector_db.search_embedding(
+                        probe, top_k=1, where=filters
+                    )
+                ]
+
+            timer.lap("precheck")
+
+            if is_hopeless(best_case_scores):
+                logger.info("Pre-check rejected turn — skipping LLM calls")
+                return {
+                    "answer": FALLBACK_ANSWER,
+                    "conversation_summary": conversation_summary,
+                    "conversation_summary_embedding": conversation_summary_embedding,
+                    "current_topic_embedding": current_topic_embedding,
+                    "topic_relation": topic_info["relation"],
+                    "topic_similarity": topic_info["similarity"],
+                    "topic_resumed": topic_info.get("resumed", False),
+                    "retrieval_scores": best_case_scores,
+                    "timings": timer.finish(),
+                }
 
         # --------------------------------------------------------------
         # Step 3: Query rewrite (unchanged)
@@ -85,19 +202,32 @@ def run_rag_pipeline(
             topic_info["relation"],
             llm
         )
+        timer.lap("rewrite")
 
         # --------------------------------------------------------------
         # Step 4: Retrieval
         # --------------------------------------------------------------
         logger.info("Step 4: Retrieving documents")
 
+        # Same-topic follow-ups are re-ranked from the topic's pool
+        search_backend = vector_db
+        if candidate_pool is not None:
+            if (
+                topic_info["relation"] != "same_topic"
+                or topic_info.get("resumed")
+            ):
+                candidate_pool.reset()
+            search_backend = candidate_pool
+
         retrieved_docs = retrieve_documents(
-            vector_db,
+            search_backend,
             rewritten_query,
             conversation_summary,
-            topic_info["relation"]
+            topic_info["relation"],
+            filters
         )
 
+        timer.lap("retrieve")
         logger.info("Retrieved %d documents", len(retrieved_docs))
 
         # --------------------------------------------------------------
@@ -105,19 +235,23 @@ def run_rag_pipeline(
         # --------------------------------------------------------------
         logger.info("Step 5: Confidence evaluation")
 
-        is_first_turn = conversation_summary is None or conversation_summary.strip() == ""
         confident = is_confident(retrieved_docs)
 
+        retrieval_scores = [doc["score"] for doc in retrieved_docs]
+        timer.lap("confidence")
         logger.info("Confidence result: %s", confident)
 
         if not confident and not is_first_turn:
             return {
-                "answer": "I don’t have enough relevant information to answer this confidently.",
+                "answer": FALLBACK_ANSWER,
                 "conversation_summary": conversation_summary,
                 "conversation_summary_embedding": conversation_summary_embedding,
                 "current_topic_embedding": current_topic_embedding,
                 "topic_relation": topic_info["relation"],
                 "topic_similarity": topic_info["similarity"],
+                "topic_resumed": topic_info.get("resumed", False),
+                "retrieval_scores": retrieval_scores,
+                "timings": timer.finish(),
             }
 
         # --------------------------------------------------------------
@@ -125,52 +259,90 @@ def run_rag_pipeline(
         # --------------------------------------------------------------
         logger.info("Step 6: Generating answer")
 
-        answer = generate_answer(
-            llm,
-            user_query,
-            retrieved_docs,
-            is_first_turn=is_first_turn
-        )
+        # Text is read only for the chunks that made it this far
+        fill_contents(retrieved_docs)
 
+        answer = updated_summary = None
+        if fused_summary:
+            # One call for answer + summary; None parts fall back below
+            answer, updated_summary = generate_answer_with_summary(
+                llm,
+                user_query,
+                retrieved_docs,
+                conversation_summary,
+                is_first_turn=is_first_turn
+            )
+        if answer is None:
+            answer = generate_answer(
+                llm,
+                user_query,
+                retrieved_docs,
+                is_first_turn=is_first_turn
+            )
+
+        timer.lap("answer")
         logger.info("Answer generated successfully")
 
         # --------------------------------------------------------------
         # Step 7: Update conversation summary (LONG-TERM MEMORY ONLY)
         # --------------------------------------------------------------
-        logger.info("Step 7: Updating conversation summary")
+        if updated_summary is None:
+            logger.info("Step 7: Updating conversation summary")
 
-        updated_summary = update_summary(
-            llm,
-            conversation_summary,
-            user_query,
-            answer
-        )
+            updated_summary = update_summary(
+                llm,
+                conversation_summary,
+                user_query,
+                answer
+            )
+            timer.lap("summary")
 
         # --------------------------------------------------------------
         # Step 8: Update CURRENT TOPIC embedding (FIXED)
         # --------------------------------------------------------------
-        if topic_info["relation"] == "new_topic" or current_topic_embedding is None:
-            updated_topic_embedding = query_embedding
-        elif topic_info["relation"] == "same_topic":
-            updated_topic_embedding = (
-                0.7 * np.array(current_topic_embedding, dtype=np.float32)
-                + 0.3 * np.array(query_embedding, dtype=np.float32)
-            )
-        else:  # partial
+        updated_summary_embedding = embed_text(embedder, updated_summary)
+        blend_weight = {"same_topic": 0.3, "partial": 0.1}.get(
+            topic_info["relation"]
+        )
+
+        if blend_weight is None or current_topic_embedding is None:
+            updated_topic_embedding = list(query_embedding)
+        else:
             updated_topic_embedding = (
-                0.9 * np.array(current_topic_embedding, dtype=np.float32)
-                + 0.1 * np.array(query_embedding, dtype=np.float32)
+                (1.0 - blend_weight)
+                * np.asarray(current_topic_embedding, dtype=np.float32)
+                + blend_weight * np.asarray(query_embedding, dtype=np.float32)
             ).tolist()
 
+        if topic_memory is not None:
+            if blend_weight is None or topic_memory.current is None:
+                topic_memory.add(
+                    query_embedding,
+                    updated_summary,
+                    updated_summary_embedding
+                )
+            else:
+                topic_memory.update(
+                    topic_memory.current,
+                    query_embedding,
+                    blend_weight,
+                    updated_summary,
+                    updated_summary_embedding
+                )
+
+        timer.lap("memory")
         logger.info("RAG pipeline completed successfully")
 
         return {
             "answer": answer,
             "conversation_summary": updated_summary,
-            "conversation_summary_embedding": embed_text(embedder, updated_summary),
+            "conversation_summary_embedding": updated_summary_embedding,
             "current_topic_embedding": updated_topic_embedding,   # ✅ RETURNED
             "topic_relation": topic_info["relation"],
             "topic_similarity": topic_info["similarity"],
+            "topic_resumed": topic_info.get("resumed", False),
+            "retrieval_scores": retrieval_scores,
+            "timings": timer.finish(),
         }
 
     except Exception:
@@ -0,0 +1,144 @@
+import os
+import io
+import time
+import pstats
+import cProfile
+import logging
+import itertools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Settings
+# ------------------------------------------------------------------
+# RAG_PROFILE=1 profiles every turn; RAG_PROFILE_SAMPLE=N profiles one
+# turn in N. Both are read once at import so the disabled path costs a
+# single branch.
+PROFILE_ALWAYS = os.environ.get("RAG_PROFILE", "") not in ("", "0")
+PROFILE_SAMPLE = int(os.environ.get("RAG_PROFILE_SAMPLE", "0"))
+PROFILE_DIR = os.environ.get("RAG_PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.environ.get("RAG_PROFILE_KEEP", "50"))
+TRACEMALLOC_FRAMES = 10
+TOP_ALLOCATIONS = 30
+
+_turns = itertools.count(1)
+# cProfile covers one thread and tracemalloc the whole process, so only
+# one turn is profiled at a time.
+_active = threading.Lock()
+
+
+def _should_profile(force: bool) -> bool:
+    if force or PROFILE_ALWAYS:
+        return True
+    return PROFILE_SAMPLE > 0 and next(_turns) % PROFILE_SAMPLE == 0
+
+
+# ------------------------------------------------------------------
+# Output
+# ------------------------------------------------------------------
+def _rotate(directory, keep):
+    """
+    Deletes the oldest profiles so at most `keep` turns are kept.
+    """
+    stems = sorted({
+        name.rsplit(".", 1)[0]
+        for name in os.listdir(directory)
+        if name.endswith((".prof", ".txt"))
+    })
+
+    for stem in stems[:-keep] if keep else []:
+        for ext in (".prof", ".txt"):
+            path = os.path.join(directory, stem + ext)
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _write(profiler, snapshot, peak_bytes, elapsed, label):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    stem = os.path.join(
+        PROFILE_DIR,
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{label}"
+    )
+
+    profiler.dump_stats(stem + ".prof")
+
+    report = io.StringIO()
+    report.write(f"wall_seconds: {elapsed:.4f}\n")
+    report.write(f"peak_traced_bytes: {peak_bytes}\n\n")
+
+    report.write("== Top cumulative CPU ==\n")
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(25)
+
+    report.write(f"\n== Top {TOP_ALLOCATIONS} allocation sites ==\n")
+    for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+        report.write(f"{stat}\n")
+
+    with open(stem + ".txt", "w", encoding="utf-8") as f:
+        f.write(report.getvalue())
+
+    _rotate(PROFILE_DIR, PROFILE_KEEP)
+    logger.info("Profile written to %s.{prof,txt}", stem)
+
+
+# ------------------------------------------------------------------
+# Profiling Context
+# ------------------------------------------------------------------
+@contextmanager
+def maybe_profile(force: bool = False, label: str = "turn"):
+    """
+    Profiles the enclosed block (CPU via cProfile, allocations via
+    tracemalloc) when forced, enabled by RAG_PROFILE, or sampled by
+    RAG_PROFILE_SAMPLE. Otherwise does nothing.
+    """
+    if not _should_profile(force) or not _active.acquire(blocking=False):
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+
+    try:
+        yield
+
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+
+            _write(profiler, snapshot, peak_bytes, elapsed, label)
+
+        except Exception:
+            logger.exception("Failed to write profile")
+
+        finally:
+            _active.release()
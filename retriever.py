@@ -24,10 +24,11 @@ def retrieve_documents(
     vector_db,
     query: str,
     context_summary: str | None,
-    relation: str
+    relation: str,
+    filters: dict | None = None
 ) -> list[dict]:
     """
-    Performs vector search.
+    Performs vector search, optionally restricted by a metadata filter.
     """
     logger.info("retrieve_documents called | relation=%s", relation)
     logger.debug("Query length: %d", len(query))
@@ -37,7 +38,7 @@ def retrieve_documents(
         # Primary retrieval
         # ----------------------------------------------------------
         logger.info("Performing primary vector search | top_k=%d", TOP_K)
-        docs = vector_db.search(query, top_k=TOP_K)
+        docs = vector_db.search(query, top_k=TOP_K, where=filters)
         logger.info("Primary retrieval returned %d documents", len(docs))
 
         # ----------------------------------------------------------
@@ -54,7 +55,8 @@ def retrieve_documents(
 
             context_docs = vector_db.search(
                 context_summary,
-                top_k=TOP_K
+                top_k=TOP_K,
+                where=filters
             )
 
             logger.info(
@@ -64,6 +66,13 @@ def retrieve_documents(
 
             docs.extend(context_docs)
 
+            # Keep each chunk once, at its best score
+            best = {}
+            for doc in docs:
+                if doc["id"] not in best or doc["score"] > best[doc["id"]]["score"]:
+                    best[doc["id"]] = doc
+            docs = sorted(best.values(), key=lambda doc: doc["score"], reverse=True)
+
         logger.info(
             "Total documents returned after merge: %d",
             len(docs)
@@ -0,0 +1,400 @@
+# serve.py
+
+import os
+import time
+import uuid
+import logging
+import argparse
+import threading
+import multiprocessing as mp
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+from multiprocessing.managers import BaseManager
+import gradio as gr
+
+# Loads the embedding model and opens Chroma once, in this process.
+# A spawner process is forked from it at startup, before any thread or
+# model.encode call (torch's thread pool does not survive a fork), and
+# every worker, including replacements, is forked from that spawner.
+# Workers share the model weights copy-on-write; only this process
+# ever touches Chroma.
+import chroma_store
+from gradio_app import (
+    VectorDBAdapter,
+    new_session_state,
+    run_turn,
+    format_reply,
+    build_demo,
+    source_filter,
+    ingest_fn,
+)
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+MAX_SESSIONS_PER_WORKER = 1000
+TURN_TIMEOUT = 120.0            # seconds a chat turn may wait for its worker
+WORKER_RESTART_DELAY = 1.0     # seconds before replacing a dead worker
+SHARD_STATS_INTERVAL = 300.0    # seconds between per-shard latency reports
+
+
+# ------------------------------------------------------------------
+# Store Service (runs in the parent)
+# ------------------------------------------------------------------
+class StoreService:
+    """
+    Single owner of the persistent Chroma client. Workers reach it over
+    a multiprocessing manager connection instead of each opening the
+    store (and loading its own copy of the HNSW index). Live index
+    updates are applied in this process too.
+    """
+
+    def search_many(self, query_embeddings, top_k=5, include_embeddings=False, where=None):
+        return chroma_store.search_many(query_embeddings, top_k, include_embeddings, where)
+
+    def index_version(self):
+        return chroma_store.index_version()
+
+    def shard_stats(self):
+        return chroma_store.shard_stats()
+
+
+_store_service = StoreService()
+
+
+class StoreManager(BaseManager):
+    pass
+
+
+StoreManager.register(
+    "store", callable=lambda: _store_service, exposed=("search_many", "index_version", "shard_stats")
+)
+
+
+class RemoteVectorDB(VectorDBAdapter):
+    """
+    Embeds locally with the inherited model and searches through the
+    parent's store service.
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def search_embedding(self, query_embedding, top_k=5, include_embeddings=False, where=None):
+        return self.store.search_many(
+            [query_embedding], top_k, include_embeddings, where
+        )[0]
+
+    def index_version(self):
+        return self.store.index_version()
+
+
+# ------------------------------------------------------------------
+# Worker Process
+# ------------------------------------------------------------------
+def _worker_main(worker_idx, requests, responses, store_address, authkey,
+                 torch_threads, turn_threads):
+    """
+    Serves turns read from the `requests` pipe and writes replies to
+    its own `responses` pipe, so a worker dying mid-write cannot block
+    the others.
+    """
+    import torch
+    torch.set_num_threads(torch_threads)
+
+    manager = StoreManager(address=store_address, authkey=authkey)
+    manager.connect()
+    vector_db = RemoteVectorDB(manager.store())
+
+    sessions = OrderedDict()
+    sessions_lock = threading.Lock()
+
+    def get_session(session_id):
+        with sessions_lock:
+            if session_id not in sessions:
+                sessions[session_id] = (threading.Lock(), new_session_state(vector_db))
+                if len(sessions) > MAX_SESSIONS_PER_WORKER:
+                    sessions.popitem(last=False)
+            sessions.move_to_end(session_id)
+            return sessions[session_id]
+
+    send_lock = threading.Lock()
+
+    def reply(request_id, result, error):
+        try:
+            with send_lock:
+                responses.send((request_id, result, error))
+        except OSError:
+            logger.warning("Worker %d could not deliver a reply", worker_idx)
+
+    def handle(request_id, session_id, message, filters):
+        try:
+            lock, state = get_session(session_id)
+            # Turns of one session run in order
+            with lock:
+                result = run_turn(state, message, vector_db, filters)
+            reply(request_id, format_reply(result), None)
+        except Exception as e:
+            logger.exception("Worker %d failed a turn", worker_idx)
+            reply(request_id, None, repr(e))
+
+    logger.info("Worker %d ready (pid=%d)", worker_idx, os.getpid())
+
+    with ThreadPoolExecutor(max_workers=turn_threads) as pool:
+        while True:
+            try:
+                request = requests.recv()
+            except EOFError:        # the router is gone
+                break
+            if request is None:
+                break
+            pool.submit(handle, *request)
+
+
+# ------------------------------------------------------------------
+# Spawner Process
+# ------------------------------------------------------------------
+def _spawner_main(conn, router_end, authkey, torch_threads, turn_threads):
+    """
+    Forks workers on request. It is forked from the parent before any
+    thread starts (and before the store socket is bound), so
+    replacement workers start from the same clean state as the first
+    ones. Each request is (worker index, store address) followed by the
+    worker's two pipe ends; the reply is the worker's pid.
+    """
+    router_end.close()      # so the router exiting reads as EOF here
+
+    while True:
+        if conn.poll(WORKER_RESTART_DELAY):
+            try:
+                idx, store_address = conn.recv()
+            except EOFError:        # the router is gone
+                break
+            request_fd = reduction.recv_handle(conn)
+            response_fd = reduction.recv_handle(conn)
+
+            pid = os.fork()
+            if pid == 0:
+                conn.close()
+                code = 1
+                try:
+                    _worker_main(
+                        idx,
+                        Connection(request_fd, writable=False),
+                        Connection(response_fd, readable=False),
+                        store_address, authkey, torch_threads, turn_threads
+                    )
+                    code = 0
+                except BaseException:
+                    logger.exception("Worker %d crashed", idx)
+                finally:
+                    os._exit(code)
+
+            # Only the worker keeps its pipe ends, so its exit closes them
+            os.close(request_fd)
+            os.close(response_fd)
+            conn.send(pid)
+
+        # Reap exited workers
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            logger.warning(
+                "Worker pid %d exited with code %d", pid, os.waitstatus_to_exitcode(status)
+            )
+
+
+# ------------------------------------------------------------------
+# Router (runs in the parent)
+# ------------------------------------------------------------------
+class WorkerRouter:
+    """
+    Sends each session to a fixed worker, so its memory stays there.
+    A dead worker (its reply pipe closes) is replaced; its in-flight
+    turns fail and its sessions start over.
+    """
+
+    def __init__(self, num_workers, torch_threads=1, turn_threads=8):
+        self.ctx = mp.get_context("fork")
+        authkey = os.urandom(16)
+
+        self.spawner, spawner_end = self.ctx.Pipe()
+        self.spawner_process = self.ctx.Process(
+            target=_spawner_main,
+            args=(spawner_end, self.spawner, authkey, torch_threads, turn_threads),
+            name="rag-spawner",
+            daemon=True,
+        )
+        self.spawner_process.start()
+        spawner_end.close()
+        self.spawner_lock = threading.Lock()
+
+        # Bound after the spawner fork, so no worker holds the listening
+        # socket (their exit would otherwise hang connecting to it)
+        manager = StoreManager(address=("127.0.0.1", 0), authkey=authkey)
+        self.store_server = manager.get_server()
+
+        self.request_conns = [None] * num_workers   # (connection, send lock)
+        self.pending = {}               # request_id -> (future, worker_idx)
+        self.pending_lock = threading.Lock()
+
+        for idx in range(num_workers):
+            self._spawn(idx)
+
+        threading.Thread(
+            target=self.store_server.serve_forever, name="store-service", daemon=True
+        ).start()
+        threading.Thread(
+            target=self._report, name="shard-stats", daemon=True
+        ).start()
+
+        logger.info("Started %d workers", num_workers)
+
+    def _spawn(self, idx):
+        request_read, request_write = self.ctx.Pipe(duplex=False)
+        response_read, response_write = self.ctx.Pipe(duplex=False)
+
+        with self.spawner_lock:
+            self.spawner.send((idx, self.store_server.address))
+            reduction.send_handle(
+                self.spawner, request_read.fileno(), self.spawner_process.pid
+            )
+            reduction.send_handle(
+                self.spawner, response_write.fileno(), self.spawner_process.pid
+            )
+            pid = self.spawner.recv()
+        request_read.close()
+        response_write.close()
+
+        self.request_conns[idx] = (request_write, threading.Lock())
+        threading.Thread(
+            target=self._collect,
+            args=(idx, pid, response_read),
+            name=f"response-collector-{idx}",
+            daemon=True,
+        ).start()
+
+    def _fail_pending(self, error, worker_idx=None):
+        with self.pending_lock:
+            failed = [
+                request_id
+                for request_id, (_, idx) in self.pending.items()
+                if worker_idx is None or idx == worker_idx
+            ]
+            futures = [self.pending.pop(request_id)[0] for request_id in failed]
+
+        for future in futures:
+            future.set_exception(error)
+        return len(futures)
+
+    def _collect(self, idx, pid, responses):
+        while True:
+            try:
+                request_id, reply, error = responses.recv()
+            except (EOFError, OSError):
+                break
+
+            with self.pending_lock:
+                entry = self.pending.pop(request_id, None)
+            if entry is None:
+                continue
+
+            future = entry[0]
+            if error is None:
+                future.set_result(reply)
+            else:
+                future.set_exception(RuntimeError(error))
+
+        # The reply pipe closes only when the worker exits
+        responses.close()
+        self.request_conns[idx][0].close()
+        failed = self._fail_pending(RuntimeError(f"Worker {idx} exited"), idx)
+        logger.error(
+            "Worker %d (pid %d) exited — failed %d pending turns, restarting",
+            idx,
+            pid,
+            failed
+        )
+
+        time.sleep(WORKER_RESTART_DELAY)
+        try:
+            self._spawn(idx)
+        except Exception:
+            logger.exception("Could not restart worker %d", idx)
+
+    def _report(self):
+        while True:
+            time.sleep(SHARD_STATS_INTERVAL)
+            chroma_store.log_shard_stats()
+
+    def submit(self, session_id: str, message: str, filters=None) -> Future:
+        request_id = uuid.uuid4().hex
+        future = Future()
+
+        worker_idx = hash(session_id) % len(self.request_conns)
+        with self.pending_lock:
+            self.pending[request_id] = (future, worker_idx)
+
+        conn, send_lock = self.request_conns[worker_idx]
+        try:
+            with send_lock:
+                conn.send((request_id, session_id, message, filters))
+        except OSError:
+            # The worker died and is being replaced
+            with self.pending_lock:
+                entry = self.pending.pop(request_id, None)
+            if entry is not None:
+                future.set_exception(RuntimeError(f"Worker {worker_idx} is restarting"))
+        return future
+
+
+# ------------------------------------------------------------------
+# Main Execution
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-worker RAG chat server.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--torch-threads", type=int, default=1)
+    parser.add_argument("--turn-threads", type=int, default=8)
+    parser.add_argument("--port", type=int, default=7860)
+    parser.add_argument("--turn-timeout", type=float, default=TURN_TIMEOUT)
+    args = parser.parse_args()
+
+    router = WorkerRouter(args.workers, args.torch_threads, args.turn_threads)
+
+    def chat_fn(user_message: str, history, source_group: str, request: gr.Request):
+        logger.info("New chat message received")
+        future = router.submit(
+            request.session_hash, user_message, source_filter(source_group)
+        )
+        try:
+            return future.result(timeout=args.turn_timeout)
+        except FutureTimeout:
+            logger.error("Turn timed out after %.0fs", args.turn_timeout)
+            raise gr.Error("The server is overloaded — please try again.")
+        except RuntimeError as e:
+            raise gr.Error(f"This turn failed: {e}")
+
+    # Live updates are embedded and written here, in the store owner
+    build_demo(chat_fn, ingest_fn).queue(default_concurrency_limit=None).launch(
+        server_port=args.port
+    )
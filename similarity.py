@@ -1,7 +1,10 @@
 import logging
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from config import SAME_TOPIC_THRESHOLD, PARTIAL_TOPIC_THRESHOLD
+from config import (
+    SAME_TOPIC_THRESHOLD,
+    PARTIAL_TOPIC_THRESHOLD,
+    PROMOTE_PARTIAL_THRESHOLD,
+)
 
 # ------------------------------------------------------------------
 # Logging Configuration
@@ -27,10 +30,11 @@ def cosine_sim(vec1, vec2) -> float:
     Computes cosine similarity between two vectors.
     """
     try:
-        similarity = cosine_similarity(
-            np.array(vec1).reshape(1, -1),
-            np.array(vec2).reshape(1, -1)
-        )[0][0]
+        vec1 = np.asarray(vec1, dtype=np.float32).ravel()
+        vec2 = np.asarray(vec2, dtype=np.float32).ravel()
+
+        denom = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+        similarity = float(vec1 @ vec2 / denom) if denom else 0.0
 
         logger.debug("Cosine similarity computed: %.4f", similarity)
         return similarity
@@ -40,6 +44,17 @@ def cosine_sim(vec1, vec2) -> float:
         raise
 
 
+# ------------------------------------------------------------------
+# Similarity → Relation
+# ------------------------------------------------------------------
+def classify_similarity(similarity: float) -> str:
+    if similarity > SAME_TOPIC_THRESHOLD:
+        return "same_topic"
+    if similarity >= PARTIAL_TOPIC_THRESHOLD:
+        return "partial"
+    return "new_topic"
+
+
 # ------------------------------------------------------------------
 # Topic Relation Detection
 # ------------------------------------------------------------------
@@ -56,12 +71,7 @@ def detect_topic_relation(
     try:
         similarity = cosine_sim(query_embedding, summary_embedding)
 
-        if similarity > SAME_TOPIC_THRESHOLD:
-            relation = "same_topic"
-        elif similarity >= PARTIAL_TOPIC_THRESHOLD:
-            relation = "partial"
-        else:
-            relation = "new_topic"
+        relation = classify_similarity(similarity)
 
         logger.info(
             "Topic relation determined: %s | Similarity: %.4f "
@@ -80,3 +90,57 @@ def detect_topic_relation(
     except Exception:
         logger.exception("Topic relation detection failed")
         raise
+
+
+# ------------------------------------------------------------------
+# Multi-Topic Matching
+# ------------------------------------------------------------------
+def match_topic(query_embedding, topic_memory) -> dict:
+    """
+    Matches the query against every topic in `topic_memory` at once.
+
+    Returns the relation to the current topic, unless an earlier topic
+    is a strong match, in which case that topic is reported as resumed.
+    """
+    logger.info("match_topic called | topics held: %d", len(topic_memory))
+
+    try:
+        similarities = topic_memory.similarities(query_embedding)
+        best = int(np.argmax(similarities))
+        best_similarity = float(similarities[best])
+
+        if (
+            best != topic_memory.current
+            and best_similarity >= PROMOTE_PARTIAL_THRESHOLD
+        ):
+            logger.info(
+                "Returning to earlier topic %d | Similarity: %.4f",
+                best,
+                best_similarity
+            )
+            return {
+                "relation": "same_topic",
+                "similarity": best_similarity,
+                "topic_index": best,
+                "resumed": True,
+            }
+
+        similarity = float(similarities[topic_memory.current])
+        relation = classify_similarity(similarity)
+
+        logger.info(
+            "Topic relation determined: %s | Similarity: %.4f",
+            relation,
+            similarity
+        )
+
+        return {
+            "relation": relation,
+            "similarity": similarity,
+            "topic_index": topic_memory.current,
+            "resumed": False,
+        }
+
+    except Exception:
+        logger.exception("Topic matching failed")
+        raise
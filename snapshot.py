@@ -0,0 +1,275 @@
+# snapshot.py
+
+import os
+import gzip
+import json
+import time
+import logging
+import argparse
+import numpy as np
+
+from chroma_store import (
+    VERSION_KEY,
+    all_collections,
+    collection,
+    is_visible,
+    max_batch_size,
+    version_view,
+    write_batch,
+)
+from content_store import default_store
+from chunk_batch import ChunkBatch
+from embedding_models import EMBEDDING_MODEL_NAME
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+# ------------------------------------------------------------------
+# Snapshot Layout
+# ------------------------------------------------------------------
+# <dir>/manifest.json      version header: format, version, count, dim
+# <dir>/embeddings.npy     float32 (count, dim), C-contiguous
+# <dir>/columns.json.gz    {"ids": [...], "documents": [...], "metadatas": [...]}
+SNAPSHOT_FORMAT = "rag_docs-snapshot"
+SNAPSHOT_VERSION = 1
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+COLUMNS_FILE = "columns.json.gz"
+
+
+# ------------------------------------------------------------------
+# Export
+# ------------------------------------------------------------------
+def export_snapshot(path):
+    """
+    Writes every rag_docs chunk (all partitions and shards) to `path`.
+    Only rows visible to searches are exported, without their live
+    update version stamp, so an importing node serves all of them.
+    """
+    view = version_view()
+    sources = all_collections()
+    count = sum(stored.count() for stored in sources)
+    logger.info("Exporting %d chunks to %s", count, path)
+
+    if count == 0:
+        raise ValueError("rag_docs is empty — nothing to export")
+
+    os.makedirs(path, exist_ok=True)
+    started = time.perf_counter()
+
+    ids, documents, metadatas = [], [], []
+    embeddings = None
+    page_size = max_batch_size()
+
+    # Partitions and shards are flattened; import re-routes every row
+    # under the importing node's own layout.
+    for stored in sources:
+        for offset in range(0, stored.count(), page_size):
+            page = stored.get(
+                limit=page_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            page_metadatas = page["metadatas"] or [None] * len(page["ids"])
+            keep = [i for i, m in enumerate(page_metadatas) if is_visible(m, view)]
+            if not keep:
+                continue
+
+            page_ids = [page["ids"][i] for i in keep]
+            page_embeddings = np.asarray(page["embeddings"], dtype=np.float32)[keep]
+            page_documents = [
+                (page["documents"] or [None] * len(page["ids"]))[i] for i in keep
+            ]
+            page_metadatas = [
+                {k: v for k, v in m.items() if k != VERSION_KEY} if m else m
+                for m in (page_metadatas[i] for i in keep)
+            ]
+
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(
+                    os.path.join(path, EMBEDDINGS_FILE),
+                    mode="w+",
+                    dtype=np.float32,
+                    shape=(count, page_embeddings.shape[1])
+                )
+
+            row = len(ids)
+            if row + len(page_embeddings) > count:
+                raise RuntimeError("Collection changed during export")
+            embeddings[row:row + len(page_embeddings)] = page_embeddings
+            ids.extend(page_ids)
+            if any(doc is None for doc in page_documents):
+                # Written with LAZY_CONTENT: the text is in the content store
+                stored_text = default_store().get_many(page_ids)
+                page_documents = [
+                    doc if doc is not None else text
+                    for doc, text in zip(page_documents, stored_text)
+                ]
+            documents.extend(page_documents)
+            metadatas.extend(page_metadatas)
+
+            logger.info("Exported %d / %d", len(ids), count)
+
+    if not ids:
+        raise ValueError("rag_docs has no visible chunks — nothing to export")
+
+    embeddings.flush()
+    dim = embeddings.shape[1]
+    if len(ids) < count:
+        # Hidden live-update rows were skipped: shrink to the rows kept
+        embeddings = _truncate_embeddings(path, embeddings, len(ids))
+    count = len(ids)
+    del embeddings
+
+    with gzip.open(os.path.join(path, COLUMNS_FILE), "wt", encoding="utf-8") as f:
+        json.dump({"ids": ids, "documents": documents, "metadatas": metadatas}, f)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "count": count,
+        "dim": dim,
+        "dtype": "float32",
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "index_version": view[0],
+        "collection_metadata": collection.metadata,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    with open(os.path.join(path, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+    logger.info(
+        "Snapshot written in %.1fs (%d chunks, dim=%d)",
+        time.perf_counter() - started,
+        count,
+        dim
+    )
+    return manifest
+
+
+def _truncate_embeddings(path, embeddings, rows):
+    target = os.path.join(path, EMBEDDINGS_FILE)
+    truncated = np.lib.format.open_memmap(
+        target + ".tmp", mode="w+", dtype=np.float32, shape=(rows, embeddings.shape[1])
+    )
+    for start_idx in range(0, rows, 65536):
+        truncated[start_idx:start_idx + 65536] = embeddings[start_idx:start_idx + 65536]
+    truncated.flush()
+    os.replace(target + ".tmp", target)
+    return truncated
+
+
+# ------------------------------------------------------------------
+# Import
+# ------------------------------------------------------------------
+def read_manifest(path):
+    with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a rag_docs snapshot")
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Unsupported snapshot version {manifest.get('version')} "
+            f"(expected {SNAPSHOT_VERSION})"
+        )
+    if manifest.get("embedding_model") != EMBEDDING_MODEL_NAME:
+        logger.warning(
+            "Snapshot was embedded with %s, this node uses %s",
+            manifest.get("embedding_model"),
+            EMBEDDING_MODEL_NAME
+        )
+
+    return manifest
+
+
+def load_snapshot(path):
+    """
+    Returns (manifest, ids, documents, metadatas, embeddings), with
+    embeddings memory-mapped rather than read into RAM.
+    """
+    manifest = read_manifest(path)
+
+    embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+    with gzip.open(os.path.join(path, COLUMNS_FILE), "rt", encoding="utf-8") as f:
+        columns = json.load(f)
+
+    if embeddings.shape != (manifest["count"], manifest["dim"]):
+        raise ValueError(
+            f"Embedding shape {embeddings.shape} does not match manifest "
+            f"({manifest['count']}, {manifest['dim']})"
+        )
+    if len(columns["ids"]) != manifest["count"]:
+        raise ValueError("Column length does not match manifest count")
+
+    return (
+        manifest,
+        columns["ids"],
+        columns["documents"],
+        columns["metadatas"],
+        embeddings,
+    )
+
+
+def import_snapshot(path):
+    """
+    Bulk-upserts a snapshot into rag_docs without re-embedding.
+    """
+    manifest, ids, documents, metadatas, embeddings = load_snapshot(path)
+    count = manifest["count"]
+    logger.info("Importing %d chunks from %s", count, path)
+
+    started = time.perf_counter()
+    page_size = max_batch_size()
+
+    for start_idx in range(0, count, page_size):
+        end_idx = start_idx + page_size
+        page_metadatas = metadatas[start_idx:end_idx]
+
+        write_batch(ChunkBatch(
+            ids[start_idx:end_idx],
+            documents[start_idx:end_idx],
+            embeddings[start_idx:end_idx],
+            # Per row: Chroma accepts None but rejects an empty dict
+            metadatas=[m or None for m in page_metadatas] if any(page_metadatas) else None,
+        ))
+        logger.info("Imported %d / %d", min(end_idx, count), count)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Snapshot imported in %.1fs (%.1f rows/sec)",
+        elapsed,
+        count / elapsed if elapsed else float("inf")
+    )
+    return count
+
+
+# ------------------------------------------------------------------
+# Main Execution
+# ------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export or import a portable rag_docs snapshot."
+    )
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="Snapshot directory")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_snapshot(args.path)
+    else:
+        import_snapshot(args.path)
@@ -0,0 +1,23 @@
+from content_store import ContentStore
+
+
+def test_reappended_id_returns_latest_text(tmp_path):
+    store = ContentStore(str(tmp_path))
+
+    store.append(["a"], ["old text"])
+    assert store.get("a") == "old text"
+
+    store.append(["a"], ["NEW text"])
+    assert store.get("a") == "NEW text"
+
+
+def test_reader_sees_other_writers_replacements(tmp_path):
+    writer = ContentStore(str(tmp_path))
+    reader = ContentStore(str(tmp_path))
+
+    writer.append(["a", "b"], ["first", ""])
+    assert reader.get_many(["a", "b", "missing"]) == ["first", "", None]
+
+    writer.append(["a"], ["second"])
+    assert reader.get("a") == "second"
+    assert len(reader) == 2
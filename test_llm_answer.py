@@ -0,0 +1,32 @@
+from llm_answer import _parse_fused, generate_answer_with_summary
+
+
+def test_parse_fused_reads_fenced_json():
+    reply = '```json\n{"answer": " a ", "summary": "s"}\n```'
+    assert _parse_fused(reply) == ("a", "s")
+
+
+def test_parse_fused_rejects_truncated_reply():
+    assert _parse_fused('{"answer":"a","summ') == (None, None)
+    assert _parse_fused("plain text answer") == (None, None)
+
+
+def test_parse_fused_keeps_answer_without_summary():
+    assert _parse_fused('{"answer": "a"}') == ("a", None)
+    assert _parse_fused('{"answer": "a", "summary": ""}') == ("a", None)
+
+
+def test_summary_is_kept_out_of_the_answer_rules():
+    prompts = []
+
+    def llm(prompt):
+        prompts.append(prompt)
+        return '{"answer": "a", "summary": "s"}'
+
+    answer, summary = generate_answer_with_summary(
+        llm, "q", [{"content": "ctx"}], "earlier turns"
+    )
+    assert (answer, summary) == ("a", "s")
+    prompt = prompts[0]
+    assert prompt.index("Question:") < prompt.index("earlier turns")
+    assert "Do NOT use the summary below to write the answer" in prompt
@@ -0,0 +1,117 @@
+import logging
+import numpy as np
+from config import TOPIC_MEMORY_SIZE
+
+# ------------------------------------------------------------------
+# Logging Configuration
+# ------------------------------------------------------------------
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+handler = logging.StreamHandler()
+formatter = logging.Formatter(
+    "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+)
+handler.setFormatter(formatter)
+
+if not logger.handlers:
+    logger.addHandler(handler)
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+# ------------------------------------------------------------------
+# Topic Memory
+# ------------------------------------------------------------------
+class TopicMemory:
+    """
+    Keeps the last `capacity` topics of a conversation.
+
+    Centroids are stored unit-normalized in one float32 matrix, so
+    matching a query against every topic is a single dot product.
+    Each topic also keeps the conversation summary as of its last turn,
+    which is restored when the user returns to it.
+    """
+
+    def __init__(self, capacity: int = TOPIC_MEMORY_SIZE):
+        self.capacity = capacity
+        self.centroids = None           # (n, dim) float32
+        self.summaries = []
+        self.summary_embeddings = []
+        self.last_used = []
+        self.current = None
+        self._clock = 0
+
+    def __len__(self):
+        return len(self.summaries)
+
+    def _touch(self, idx):
+        self._clock += 1
+        self.last_used[idx] = self._clock
+        self.current = idx
+
+    def similarities(self, query_embedding) -> np.ndarray:
+        """
+        Cosine similarity of the query to every stored topic.
+        """
+        if not len(self):
+            return np.empty(0, dtype=np.float32)
+        return self.centroids @ _unit(query_embedding)
+
+    def centroid(self, idx) -> list[float]:
+        return self.centroids[idx].tolist()
+
+    def summary(self, idx):
+        return self.summaries[idx], self.summary_embeddings[idx]
+
+    def activate(self, idx):
+        logger.info("Switching to stored topic %d", idx)
+        self._touch(idx)
+
+    def add(self, embedding, summary, summary_embedding) -> int:
+        """
+        Stores a new topic, evicting the least recently used one when
+        full, and makes it current.
+        """
+        vector = _unit(embedding)
+
+        if self.centroids is None:
+            self.centroids = vector[np.newaxis, :].copy()
+            idx = 0
+            self.summaries.append(summary)
+            self.summary_embeddings.append(summary_embedding)
+            self.last_used.append(0)
+
+        elif len(self) < self.capacity:
+            self.centroids = np.vstack([self.centroids, vector])
+            idx = len(self)
+            self.summaries.append(summary)
+            self.summary_embeddings.append(summary_embedding)
+            self.last_used.append(0)
+
+        else:
+            idx = int(np.argmin(self.last_used))
+            logger.info("Topic memory full — evicting topic %d", idx)
+            self.centroids[idx] = vector
+            self.summaries[idx] = summary
+            self.summary_embeddings[idx] = summary_embedding
+
+        self._touch(idx)
+        logger.info("Stored new topic %d (%d topics held)", idx, len(self))
+        return idx
+
+    def update(self, idx, embedding, weight, summary, summary_embedding):
+        """
+        Moves a topic centroid towards the query by `weight` and
+        replaces its stored summary.
+        """
+        self.centroids[idx] = _unit(
+            (1.0 - weight) * self.centroids[idx] + weight * _unit(embedding)
+        )
+        self.summaries[idx] = summary
+        self.summary_embeddings[idx] = summary_embedding
+        self._touch(idx)